@@ -1,29 +1,471 @@
 """AI-powered energy analysis using gpt-oss models"""
 
+import bisect
+import copy
+import importlib.util
 import json
 import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
 import pandas as pd
 import numpy as np
 from database import EnergyDatabase
 import config
 
-# Import torch only when needed to avoid dependency issues
+# Import torch only when needed to avoid dependency issues - importing it takes seconds,
+# so startup only checks that it is installed and _load_torch() imports it with the model
+TORCH_AVAILABLE = importlib.util.find_spec('torch') is not None
+torch = None
+
+
+def _load_torch():
+    """Import torch into this module on first use"""
+    global torch
+    if torch is None:
+        import torch as torch_module
+        torch = torch_module
+    return torch
+
+# orjson is optional - report printing falls back to the standard json module
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Numba is optional - the NumPy implementation below is used without it
 try:
-    import torch
-    TORCH_AVAILABLE = True
+    from numba import njit
+    NUMBA_AVAILABLE = True
 except ImportError:
-    TORCH_AVAILABLE = False
+    NUMBA_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+
+def _device_stats_loop(power, hour, is_weekend):
+    """Single-pass device statistics over raw arrays (compiled with Numba when available).
+
+    Returns (mean, var, q10, min, max, weekend_ratio, peak_hour, usage_count).
+    """
+    n = power.size
+    if n == 0:
+        return 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0, 0
+    
+    mean = 0.0
+    m2 = 0.0
+    p_min = power[0]
+    p_max = power[0]
+    wk_sum = 0.0
+    wk_n = 0
+    hour_sum = np.zeros(24)
+    hour_cnt = np.zeros(24, dtype=np.int64)
+    for i in range(n):
+        p = power[i]
+        # Welford's online mean/variance
+        delta = p - mean
+        mean += delta / (i + 1)
+        m2 += delta * (p - mean)
+        if p < p_min:
+            p_min = p
+        if p > p_max:
+            p_max = p
+        if is_weekend[i]:
+            wk_sum += p
+            wk_n += 1
+        hour_sum[hour[i]] += p
+        hour_cnt[hour[i]] += 1
+    
+    var = m2 / (n - 1) if n > 1 else 0.0
+    
+    wd_n = n - wk_n
+    weekend_ratio = 1.0
+    if wk_n > 0 and wd_n > 0:
+        wd_mean = (mean * n - wk_sum) / wd_n
+        if wd_mean > 0.0:
+            weekend_ratio = (wk_sum / wk_n) / wd_mean
+    
+    peak_hour = 0
+    peak_mean = -np.inf
+    for h in range(24):
+        if hour_cnt[h] > 0 and hour_sum[h] / hour_cnt[h] > peak_mean:
+            peak_mean = hour_sum[h] / hour_cnt[h]
+            peak_hour = h
+    
+    # "In use" is relative to the final mean, so this count needs its own (allocation-free) pass
+    usage_count = 0
+    threshold = mean * 0.1
+    for i in range(n):
+        if power[i] > threshold:
+            usage_count += 1
+    
+    return mean, var, np.quantile(power, 0.1), p_min, p_max, weekend_ratio, peak_hour, usage_count
+
+
+def _hourly_mean_power(hour: np.ndarray, power: np.ndarray) -> np.ndarray:
+    """Mean power for each of the 24 hours from two bincounts; hours with no readings are -inf"""
+    hour_sums = np.bincount(hour, weights=power, minlength=24)
+    hour_counts = np.bincount(hour, minlength=24)
+    return np.where(hour_counts > 0, hour_sums / np.maximum(hour_counts, 1), -np.inf)
+
+
+def _top_hours(hour_means: np.ndarray, k: int = 3) -> List[int]:
+    """The k hours with the highest mean power (earlier hour wins ties), skipping empty hours"""
+    order = np.argsort(-hour_means, kind='stable')[:k]
+    return [int(h) for h in order if np.isfinite(hour_means[h])]
+
+
+def _device_peak_hours(codes: np.ndarray, hour: np.ndarray, power: np.ndarray, n_devices: int) -> np.ndarray:
+    """Peak hour per device from one bincount over the flattened (device code, hour) grid"""
+    cell = codes.astype(np.int64) * 24 + hour
+    sums = np.bincount(cell, weights=power, minlength=n_devices * 24).reshape(n_devices, 24)
+    counts = np.bincount(cell, minlength=n_devices * 24).reshape(n_devices, 24)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), -np.inf).argmax(axis=1)
+
+
+def _device_stats_numpy(power, hour, is_weekend):
+    """Vectorized fallback for _device_stats_loop when Numba isn't installed"""
+    n = power.size
+    if n == 0:
+        return 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0, 0
+    
+    total = float(power.sum(dtype=np.float64))
+    mean = total / n
+    
+    wk_n = int(np.count_nonzero(is_weekend))
+    wd_n = n - wk_n
+    weekend_ratio = 1.0
+    if wk_n > 0 and wd_n > 0:
+        wk_sum = float(power[is_weekend].sum(dtype=np.float64))
+        wd_mean = (total - wk_sum) / wd_n
+        if wd_mean > 0.0:
+            weekend_ratio = (wk_sum / wk_n) / wd_mean
+    
+    # Per-hour mean power from two bincounts instead of groupby('hour').mean()
+    hour_means = _hourly_mean_power(hour, power)
+    
+    return (mean, float(power.var(ddof=1, dtype=np.float64)) if n > 1 else 0.0, float(np.quantile(power, 0.1)),
+            float(power.min()), float(power.max()), weekend_ratio, int(hour_means.argmax()),
+            int(np.count_nonzero(power > mean * 0.1)))
+
+
+# Readings arrive as float32 power, int8 hour and bool weekend flags; accumulators stay float64
+device_stats_kernel = (njit('(float32[:], int8[:], boolean[:])', cache=True)(_device_stats_loop)
+                       if NUMBA_AVAILABLE else _device_stats_numpy)
+
+# Below this many readings a plain Python loop beats building NumPy arrays
+FAST_PATH_MAX_READINGS = 10
+
+# Readings change at sensor cadence, so analyses are reused within this window (seconds)
+ANALYSIS_CACHE_TTL = 60
+
+# Device-name keyword classifier - one regex scan instead of an if/elif ladder.
+# The first keyword found in the (lowercased) name wins; where two keywords can
+# start at the same position the more specific one is listed first.
+DEVICE_CATEGORY_RE = re.compile(
+    r'(?P<dishwasher>dishwasher)'
+    r'|(?P<washer>washing|washer|wash.*machine|machine.*wash)'
+    r'|(?P<dryer>clothes dryer|dryer)'
+    r'|(?P<water_heater>water heater)'
+    r'|(?P<ac>air conditioning|air conditioner|^ac(?: |$)| ac$)'
+    r'|(?P<fridge>fridge|refrigerator)'
+    r'|(?P<tv>tv|television)'
+    r'|(?P<computer>computer|pc|laptop)'
+    r'|(?P<microwave>microwave)'
+    r'|(?P<heater>heater|heating)'
+    r'|(?P<oven>oven)'
+)
+
+
+@lru_cache(maxsize=256)
+def _classify_device(device_name: str) -> str:
+    """Map a device name to its insight/recommendation category (classified once per name)"""
+    match = DEVICE_CATEGORY_RE.search(device_name.lower())
+    return match.lastgroup if match else 'generic'
+
+
+def _f_to_c(temp_f: float) -> float:
+    return round((temp_f - 32) * 5/9, 1)
+
+
+# Temperatures quoted in tips - Celsius worked out once at import instead of per call
+WATER_HEATER_TEMP_F = 120
+WATER_HEATER_TEMP_C = _f_to_c(WATER_HEATER_TEMP_F)
+FRIDGE_TEMP_F = 37
+FRIDGE_TEMP_C = _f_to_c(FRIDGE_TEMP_F)
+AC_TYPICAL_TEMP_F = 72  # Assume typical setting
+AC_SAVE_TEMP_F = AC_TYPICAL_TEMP_F + 2
+AC_SAVE_TEMP_C = _f_to_c(AC_SAVE_TEMP_F)
+
+# Dollars per day for each watt of average draw: W * 24h / 1000 * $/kWh
+DAILY_RATE = 24e-3 * config.ELECTRICITY_RATE
+
+# Season for each month number (index 0 unused)
+SEASON_BY_MONTH = (None, 'winter', 'winter', 'spring', 'spring', 'spring', 'summer',
+                   'summer', 'summer', 'fall', 'fall', 'fall', 'winter')
+# Same table as an array indexed by (month - 1) % 12, for bucketing many months at once
+SEASON_ARRAY = np.array(SEASON_BY_MONTH[1:])
+
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December')
+
+DAILY_SEASONAL_TIPS = {
+    'summer': "🌡️ Hot weather tip: Every degree you raise the AC saves 6-8% on cooling costs",
+    'winter': "🔥 Cold weather tip: Lower the heat by 1°F when sleeping or away from home",
+    'spring': "🌤️ Nice weather - perfect time to give your AC and heater a break!",
+    'fall': "🌤️ Nice weather - perfect time to give your AC and heater a break!",
+}
+
+
+def _washer_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    return [
+        f"🧺 Your washing machine uses {avg_power:.0f} watts per cycle",
+        f"💰 Daily cost: ${daily_cost:.2f}",
+        "❄️ Use cold water for 90% energy savings - modern detergents work great in cold!"
+    ]
+
+
+def _dishwasher_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    return [
+        f"🍽️ Dishwasher uses {avg_power:.0f} watts per cycle",
+        f"💰 Daily cost: ${daily_cost:.2f}",
+        "💡 Skip heated dry - open door instead to save 15% energy per load"
+    ]
+
+
+def _dryer_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    # Smart power-based dryer messages
+    if avg_power > 2500:
+        power_msg = f"👕 Your {device_name} uses {avg_power:.0f} watts - High power usage detected, consider shorter cycles"
+    elif avg_power > 500:
+        power_msg = f"👕 Your {device_name} uses {avg_power:.0f} watts - Normal operation, efficient drying cycle"
+    else:
+        power_msg = f"👕 Your {device_name} uses {avg_power:.0f} watts - Low power mode or cycle complete"
+    
+    return [
+        power_msg,
+        f"💰 Daily cost: ${daily_cost:.2f} (one of your highest energy users)",
+        f"🔥 {'Heavy usage detected' if stats['usage_hours_per_day'] > 2 else 'Moderate usage'} - clean lint filter for 30% better efficiency"
+    ]
+
+
+def _water_heater_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    return [
+        f"🚿 Water heater uses {avg_power:.0f} watts to keep water hot",
+        f"💰 Daily cost: ${daily_cost:.2f} (runs 24/7 to maintain temperature)",
+        f"🌡️ Set to {WATER_HEATER_TEMP_F}°F ({WATER_HEATER_TEMP_C}°C) - hot enough for safety, saves energy vs higher temps"
+    ]
+
+
+def _ac_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    return [
+        f"🌡️ AC system uses {avg_power:.0f} watts - {'Working very hard' if avg_power > 2000 else 'Normal operation'}",
+        f"💰 Daily cost: ${daily_cost:.2f} (likely your biggest energy expense)",
+        f"💡 Set to {AC_SAVE_TEMP_F}°F ({AC_SAVE_TEMP_C}°C) instead of {AC_TYPICAL_TEMP_F}°F to save 10-15% on bills"
+    ]
+
+
+def _fridge_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    return [
+        f"❄️ Your fridge uses {avg_power:.0f} watts on average - {'Great! Very efficient' if avg_power < 150 else 'Higher than typical - may need maintenance'}",
+        f"💰 Costs about ${daily_cost:.2f} per day to run",
+        f"🌡️ Best temperature: {FRIDGE_TEMP_F}°F ({FRIDGE_TEMP_C}°C) for food safety and efficiency"
+    ]
+
+
+def _tv_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    return [
+        f"📺 Your TV uses {avg_power:.0f} watts - {'Excellent! Very energy efficient' if avg_power < 100 else 'Consider newer energy-saving model'}",
+        f"💰 Daily cost: about ${daily_cost:.2f}",
+        f"⏰ {'Good job keeping standby power low!' if avg_power < 50 else 'Tip: Use a power strip to cut standby power'}"
+    ]
+
+
+def _computer_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    return [
+        f"🖥️ Your computer uses {avg_power:.0f} watts on average",
+        f"💰 Running cost: ${daily_cost:.2f} per day",
+        f"💡 {'Desktop system detected' if avg_power > 200 else 'Laptop or efficient system'} - sleep mode can save 80% energy"
+    ]
+
+
+def _microwave_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    return [
+        f"🔥 Microwave peak power: {stats['max_power_watts']:.0f} watts when cooking",
+        f"💰 Very low daily cost: ${daily_cost:.2f} (only uses power when cooking)",
+        "✅ One of your most efficient appliances - no standby power waste!"
+    ]
+
+
+def _heater_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    return [
+        f"🔥 Heater uses {avg_power:.0f} watts when running",
+        f"💰 Daily heating cost: ${daily_cost:.2f}",
+        "🌡️ Lower by just 1°F (0.5°C) to save 5% on heating bills"
+    ]
+
+
+def _oven_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    return [
+        f"🍳 Oven uses {avg_power:.0f} watts when cooking",
+        f"💰 Daily cost: ${daily_cost:.2f}",
+        "🔥 Very efficient for cooking multiple items at once - batch your baking!"
+    ]
+
+
+def _generic_insights(device_name: str, avg_power: float, daily_cost: float, stats: Dict) -> List[str]:
+    efficiency = stats['efficiency_score']
+    return [
+        f"⚡ This device uses {avg_power:.0f} watts on average",
+        f"💰 Daily cost: about ${daily_cost:.2f}",
+        f"📊 Efficiency rating: {efficiency:.0f}/100 {'(Good!)' if efficiency > 60 else '(Could be better)'}"
+    ]
+
+
+DEVICE_INSIGHTS: Dict[str, Callable[[str, float, float, Dict], List[str]]] = {
+    'washer': _washer_insights,
+    'dishwasher': _dishwasher_insights,
+    'dryer': _dryer_insights,
+    'water_heater': _water_heater_insights,
+    'ac': _ac_insights,
+    'fridge': _fridge_insights,
+    'tv': _tv_insights,
+    'computer': _computer_insights,
+    'microwave': _microwave_insights,
+    'heater': _heater_insights,
+    'oven': _oven_insights,
+    'generic': _generic_insights,
+}
+
+DEVICE_RECOMMENDATIONS: Dict[str, Tuple[str, ...]] = {
+    'washer': (
+        "❄️ Use cold water for 90% of loads - modern detergents work great!",
+        "👕 Wash full loads when possible - same energy for more clothes",
+        "🌀 Use high-speed spin to remove more water before drying"
+    ),
+    'dishwasher': (
+        "🌬️ Skip 'Heated Dry' - just open door when done, saves 15% per load",
+        "🍽️ Run only full loads - same energy whether half or completely full",
+        "💧 Use 'Eco' or 'Energy Saver' cycle when dishes aren't very dirty"
+    ),
+    'dryer': (
+        "🧹 Clean lint filter before EVERY load - improves efficiency by 30%",
+        "👕 Don't over-dry clothes - use moisture sensor if available",
+        "🌬️ Clean dryer vent outside annually - blocked vents waste huge energy",
+        "🔥 Dry full loads but don't overpack - clothes need room to tumble"
+    ),
+    'water_heater': (
+        f"🌡️ Set temperature to {WATER_HEATER_TEMP_F}°F ({WATER_HEATER_TEMP_C}°C) - safe and efficient",
+        "🚿 Take shorter showers - each minute saves significant energy",
+        "🔧 Insulate hot water pipes to reduce heat loss"
+    ),
+    'ac': (
+        "🌡️ Raise temperature by just 2°F (1°C) - you won't notice but will save 10-15%",
+        "🔧 Change air filter monthly - dirty filters make AC work harder",
+        "🌬️ Use ceiling fans to feel cooler at higher temperatures"
+    ),
+    'tv': (
+        "💡 Turn on 'Eco Mode' in settings - saves 20-30% energy automatically",
+        "⏰ Set sleep timer so TV doesn't run all night",
+        "🔌 Use a power strip to completely cut power when not watching"
+    ),
+    'computer': (
+        "💤 Set computer to sleep after 15 minutes of inactivity",
+        "🖥️ Turn off monitor separately - it uses lots of power",
+        "⚙️ Use 'Power Saver' mode in Windows settings"
+    ),
+    'fridge': (
+        f"🌡️ Set fridge to {FRIDGE_TEMP_F}°F ({FRIDGE_TEMP_C}°C) - perfect for food safety and efficiency",
+        "🧽 Clean the coils on the back/bottom every 6 months",
+        "🚪 Check door seals - should hold a dollar bill tightly when closed"
+    ),
+    'microwave': (
+        "✅ Already very efficient - only uses power when cooking",
+        "🔌 Unplug when not in use to save a few watts of standby power",
+        "🍽️ Use for reheating instead of oven - much more efficient"
+    ),
+    'oven': (
+        "🍳 Cook multiple items at once - very efficient for batch cooking",
+        "🔥 Don't preheat longer than needed - most foods don't need it",
+        "🚪 Keep door closed while cooking - each peek loses 25°F (14°C)"
+    ),
+    'heater': (
+        "🌡️ Lower temperature by 1°F (0.5°C) - saves 5% on heating bills",
+        "🔧 Change furnace filter monthly during heating season",
+        "🏠 Close vents in unused rooms to focus heat where needed"
+    ),
+    'generic': (
+        "⚡ Look for 'Energy Saver' or 'Eco' modes in device settings",
+        "🔌 Use smart plugs to automatically turn off when not needed",
+        "📊 Monitor usage patterns to find opportunities to save"
+    ),
+}
+
+# Instruction block shared by every device prompt - its KV cache is computed once and reused
+ANALYSIS_PROMPT_PREFIX = (
+    "You are a home energy advisor. Provide 3-4 specific insights about the device's "
+    "energy usage patterns and efficiency.\n"
+    "Focus on actionable observations that help the user understand their energy consumption.\n"
+)
+# Closing instruction after the device statistics - also tokenized once
+ANALYSIS_PROMPT_SUFFIX = "\nList each insight on its own line starting with '- '.\n"
+
+# Response parsing: a bullet/numbered line captures its text, otherwise a 21+ char line with a period
+AI_BULLET_RE = re.compile(r'^(?:[•*-]|\d+\.)\s*(.+?)\s*$')
+AI_SENTENCE_RE = re.compile(r'^(?=.{21}).*\.')
+
+# Greedy decoding with the KV cache on - short, deterministic answers
+GENERATION_KWARGS = {
+    'max_new_tokens': config.MAX_RESPONSE_TOKENS,
+    'do_sample': False,
+    'num_beams': 1,
+    'use_cache': True,
+}
+
+# Most queued insight jobs the background worker sends through one batched generate call
+INSIGHT_BATCH_SIZE = 8
+
+# Quantized KV cache settings per config.KV_CACHE_QUANTIZATION: (package to import, cache_config)
+KV_CACHE_BACKENDS = {
+    'int8': ('hqq', {'backend': 'HQQ', 'nbits': 8}),
+    'int4': ('optimum.quanto', {'backend': 'quanto', 'nbits': 4}),
+}
+
 class EnergyAIAnalyzer:
-    def __init__(self, use_mock_ai: bool = True):
+    def __init__(self, use_mock_ai: bool = True, use_templates: Optional[bool] = None):
         # Force use of the same database as web interface
         self.db = EnergyDatabase(db_path=str(config.DATABASE_PATH))
         self.use_mock_ai = use_mock_ai
+        # Templates restate the six stats just as well as the LLM - only deep analysis needs the model
+        self.use_templates = config.USE_TEMPLATE_INSIGHTS if use_templates is None else use_templates
         self.model = None
+        self._prefix_ids = None  # token ids for ANALYSIS_PROMPT_PREFIX
+        self._kv_cache = None  # past_key_values for ANALYSIS_PROMPT_PREFIX
+        self._suffix_ids = None  # token ids for ANALYSIS_PROMPT_SUFFIX
+        # Device names repeat on every refresh, so their header ids are tokenized once each
+        self._header_ids = lru_cache(maxsize=64)(self._encode_device_header)
+        self._cache_kwargs = {}  # generate() kwargs for a quantized KV cache, if enabled
+        
+        # LLM insights decoded off the request path: jobs go on the queue, results land in insight_cache
+        self.background_insights = getattr(config, 'BACKGROUND_AI_INSIGHTS', True)
+        self.insight_cache: Dict[str, List[str]] = {}
+        self._insight_queue = queue.Queue()
+        self._insight_pending = set()  # device ids queued or being decoded - never queued twice
+        self._insight_lock = threading.Lock()
+        self._insight_worker = None
+        
+        # Memoized analyses keyed by (args..., time bucket) - see ANALYSIS_CACHE_TTL
+        self._device_analysis_cache = lru_cache(maxsize=64)(self._analyze_device_patterns)
+        self._home_analysis_cache = lru_cache(maxsize=8)(self._analyze_home_energy)
+        # Finished months never change, so their aggregates are kept for the analyzer's lifetime
+        # (only successful loads - a failed lookup raises out of the cache and is retried next time)
+        self._closed_month_cache = lru_cache(maxsize=64)(self._load_month_data)
         
         if not use_mock_ai:
             self._initialize_gpt_oss()
@@ -38,6 +480,7 @@ class EnergyAIAnalyzer:
                 from transformers import AutoTokenizer, AutoModelForCausalLM
                 if not TORCH_AVAILABLE:
                     raise ImportError("torch not available")
+                _load_torch()
                 
                 # Check if CUDA is available for GPU acceleration
                 device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -52,11 +495,27 @@ class EnergyAIAnalyzer:
                     self.tokenizer = AutoTokenizer.from_pretrained(model_name)
                     self.model = AutoModelForCausalLM.from_pretrained(
                         model_name,
-                        torch_dtype=torch.float16 if device == "cuda" else torch.float32,
-                        device_map="auto" if device == "cuda" else None,
-                        low_cpu_mem_usage=True
+                        low_cpu_mem_usage=True,
+                        **self._model_load_kwargs(device),
+                        **self._attention_kwargs(device)
                     )
                     self.device = device
+                    self.model.config.use_cache = True
+                    
+                    # The instruction prefix never changes - tokenize it once per process
+                    self._prefix_ids = self.tokenizer.encode(
+                        ANALYSIS_PROMPT_PREFIX, return_tensors="pt", add_special_tokens=True
+                    ).to(device)
+                    self._suffix_ids = self.tokenizer.encode(
+                        ANALYSIS_PROMPT_SUFFIX, return_tensors="pt", add_special_tokens=False
+                    ).to(device)
+                    # One KV path per process: a quantized cache built by generate() (full prefill every call),
+                    # or the full-precision prefix cache - a primed DynamicCache can't be quantized afterwards
+                    self._cache_kwargs = self._kv_cache_kwargs()
+                    if self._cache_kwargs:
+                        logger.info("Quantized KV cache active - prompt prefix cache disabled, prompts prefilled in full")
+                    else:
+                        self._prime_prefix_cache()
                     logger.info(f"Successfully loaded gpt-oss model: {model_name}")
                     
                 except Exception as model_error:
@@ -73,585 +532,511 @@ class EnergyAIAnalyzer:
             logger.info("Using mock AI as fallback")
             self.use_mock_ai = True
     
-    def analyze_device_patterns(self, device_id: str, days: int = 7) -> Dict:
-        """Analyze usage patterns for a specific device"""
-        readings = self.db.get_recent_readings(device_id, hours=days*24)
+    def _prime_prefix_cache(self):
+        """Run the shared instruction prefix through the model once and keep its KV cache.
         
-        if not readings:
-            return {
-                'device_id': device_id,
-                'analysis_period_days': days,
-                'statistics': {
-                    'avg_power_watts': 0.0,
-                    'max_power_watts': 0.0,
-                    'min_power_watts': 0.0,
-                    'total_energy_kwh': 0.0,
-                    'total_cost': 0.0,
-                    'usage_hours_per_day': 0.0,
-                    'peak_usage_hour': 18,
-                    'weekend_vs_weekday_ratio': 1.0,
-                    'efficiency_score': 50.0
-                },
-                'insights': ['📊 No recent data for this device - check connection'],
-                'recommendations': ['🔌 Ensure device is connected and collecting data']
-            }
+        Only used when the KV cache isn't quantized (see config.KV_CACHE_QUANTIZATION); each generate()
+        call deep-copies these prefix K/V tensors, which is cheaper than prefilling the prefix again.
+        """
+        try:
+            from transformers import DynamicCache
+            
+            cache = DynamicCache()
+            with torch.inference_mode():
+                self.model(self._prefix_ids, past_key_values=cache, use_cache=True)
+            self._kv_cache = cache
+            logger.info("Full-precision KV cache with the prompt prefix cache active")
+        except Exception as e:
+            logger.info(f"Prompt prefix cache unavailable, prefilling full prompts: {e}")
+            self._kv_cache = None
+    
+    def _kv_cache_kwargs(self) -> Dict:
+        """generate() kwargs for a quantized KV cache - decode re-reads every cached K/V per token, so fewer bytes wins"""
+        quantization = getattr(config, 'KV_CACHE_QUANTIZATION', 'none')
+        if quantization not in KV_CACHE_BACKENDS:
+            return {}
         
-        # Convert to DataFrame for analysis
-        df = pd.DataFrame(readings)
+        package, cache_config = KV_CACHE_BACKENDS[quantization]
+        try:
+            __import__(package)
+        except ImportError:
+            logger.info(f"{package} not installed - keeping the KV cache in full precision")
+            return {}
+        
+        logger.info(f"Using {quantization} KV cache quantization")
+        return {'cache_implementation': 'quantized', 'cache_config': dict(cache_config)}
+    
+    def _attention_kwargs(self, device: str) -> Dict:
+        """Ask for fused scaled-dot-product attention instead of the eager softmax/matmul path"""
+        import transformers
+        
+        # attn_implementation arrived in transformers 4.36 - older releases only have eager attention
+        major, minor = (int(part) for part in transformers.__version__.split('.')[:2])
+        if (major, minor) < (4, 36) or not hasattr(torch.nn.functional, 'scaled_dot_product_attention'):
+            return {}
+        
+        if device == "cuda":
+            # Let SDPA dispatch to the FlashAttention kernel where the GPU supports it
+            torch.backends.cuda.enable_flash_sdp(True)
+            torch.backends.cuda.enable_mem_efficient_sdp(True)
+        return {'attn_implementation': 'sdpa'}
+    
+    def _model_load_kwargs(self, device: str) -> Dict:
+        """Pick weight precision for from_pretrained - decode is memory-bandwidth bound, so fewer bytes per weight wins"""
+        if device != "cuda":
+            # BF16 halves the weight bytes vs FP32 and is fast on AVX512-BF16/AMX CPUs
+            torch.set_float32_matmul_precision('medium')
+            return {'torch_dtype': torch.bfloat16}
+        
+        compute_dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        quantization = getattr(config, 'MODEL_QUANTIZATION', 'int8')
+        if quantization == 'none':
+            return {'torch_dtype': compute_dtype, 'device_map': "auto"}
         
-        # Safely convert timestamp to datetime
         try:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df['hour'] = df['timestamp'].dt.hour
-            df['day_of_week'] = df['timestamp'].dt.dayofweek
-            df['is_weekend'] = df['day_of_week'] >= 5
-        except Exception:
-            # Fallback if timestamp conversion fails
-            df['hour'] = 12  # Default to noon
-            df['day_of_week'] = 1  # Default to Tuesday
-            df['is_weekend'] = False
+            import bitsandbytes  # noqa: F401 - only needed for quantized loading
+            from transformers import BitsAndBytesConfig
+        except ImportError:
+            logger.info("bitsandbytes not installed - loading gpt-oss in half precision")
+            return {'torch_dtype': compute_dtype, 'device_map': "auto"}
         
-        # Calculate statistics
-        stats = self._calculate_device_stats(df)
+        if quantization == 'nf4':
+            # NF4 weights with BF16 compute: ~4x smaller than FP16
+            quantization_config = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_compute_dtype=compute_dtype,
+                bnb_4bit_quant_type='nf4',
+            )
+        else:
+            # LLM.int8() vector-wise weights: half of FP16, runs on INT8 tensor cores.
+            # The output head stays in half precision to protect the logits.
+            quantization_config = BitsAndBytesConfig(
+                load_in_8bit=True,
+                llm_int8_skip_modules=['lm_head'],
+            )
+        
+        logger.info(f"Loading gpt-oss with {quantization} weight quantization")
+        return {
+            'torch_dtype': compute_dtype,
+            'device_map': "auto",
+            'quantization_config': quantization_config,
+        }
+    
+    def analyze_device_patterns(self, device_id: str, days: int = 7) -> Dict:
+        """Analyze usage patterns for a specific device (cached for ANALYSIS_CACHE_TTL seconds)"""
+        bucket = int(time.time() // ANALYSIS_CACHE_TTL)
+        # Hand out a copy so callers mutating the result can't poison the cache
+        return copy.deepcopy(self._device_analysis_cache(device_id, days, bucket))
+    
+    def _analyze_device_patterns(self, device_id: str, days: int = 7, bucket: int = 0) -> Dict:
+        """Analyze usage patterns for a specific device"""
+        readings = self.db.get_recent_readings_columnar(device_id, hours=days*24)
+        
+        if not readings['timestamp'].size:
+            return self._empty_device_analysis(device_id, days)
+        
+        device_name, stats = self._device_stats_from_readings(device_id, readings)
         
         # Generate AI insights
-        insights = self._generate_device_insights(device_id, df, stats)
+        insights = self._generate_device_insights(device_id, device_name, stats)
         
-        # Convert numpy types to Python types for JSON serialization
-        stats_json = {}
-        for key, value in stats.items():
-            if hasattr(value, 'item'):  # numpy scalar
-                stats_json[key] = value.item()
-            else:
-                stats_json[key] = value
+        return self._device_analysis(device_id, device_name, days, stats, insights)
+    
+    def analyze_all_devices(self, device_ids: Optional[List[str]] = None, days: int = 7) -> Dict[str, Dict]:
+        """Analyze every device from one query, generating all AI insights in a single batch"""
+        columns = self.db.get_recent_readings_columnar(hours=days*24)
+        
+        # Split the columns per device with one stable sort on integer device codes
+        codes, uniques = pd.factorize(columns['device_id'], sort=False)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        readings_by_device = {
+            device: {name: col[order[bounds[k]:bounds[k + 1]]] for name, col in columns.items()}
+            for k, device in enumerate(uniques)
+        }
+        
+        if device_ids is None:
+            device_ids = list(readings_by_device)
+        
+        results = {}
+        pending = []  # (device_id, device_name, stats) still waiting for insights
+        for device_id in device_ids:
+            readings = readings_by_device.get(device_id)
+            if readings is None:
+                results[device_id] = self._empty_device_analysis(device_id, days)
+                continue
+            device_name, stats = self._device_stats_from_readings(device_id, readings)
+            pending.append((device_id, device_name, stats))
         
-        # Clean up any NaN or infinite values
-        import math
-        for key, value in stats_json.items():
-            if isinstance(value, float):
-                if math.isnan(value) or math.isinf(value):
-                    stats_json[key] = 0.0
+        for (device_id, device_name, stats), insights in zip(pending, self._generate_device_insights_batch(pending)):
+            results[device_id] = self._device_analysis(device_id, device_name, days, stats, insights)
         
+        # Keep the caller's device order
+        return {device_id: results[device_id] for device_id in device_ids}
+    
+    def generate_device_insights_batch(self, device_ids: List[str], days: int = 7) -> Dict[str, List[str]]:
+        """AI insights for several devices from a single batched model.generate call"""
+        return {device_id: analysis['insights'] for device_id, analysis in self.analyze_all_devices(device_ids, days).items()}
+    
+    def analyze_all_devices_parallel(self, device_ids: List[str], days: int = 7) -> Dict[str, Dict]:
+        """Run analyze_device_patterns for each device on a small thread pool"""
+        if not device_ids:
+            return {}
+        
+        # Each worker thread reads through its own per-thread EnergyDatabase connection, so workers share nothing but the cache
+        with ThreadPoolExecutor(max_workers=min(8, len(device_ids))) as executor:
+            results = list(executor.map(lambda device_id: self.analyze_device_patterns(device_id, days), device_ids))
+        
+        return dict(zip(device_ids, results))
+    
+    def _empty_device_analysis(self, device_id: str, days: int) -> Dict:
+        """Placeholder analysis for a device with no recent readings"""
         return {
             'device_id': device_id,
             'analysis_period_days': days,
-            'statistics': stats_json,
+            'statistics': {
+                'avg_power_watts': 0.0,
+                'max_power_watts': 0.0,
+                'min_power_watts': 0.0,
+                'total_energy_kwh': 0.0,
+                'total_cost': 0.0,
+                'usage_hours_per_day': 0.0,
+                'peak_usage_hour': 18,
+                'weekend_vs_weekday_ratio': 1.0,
+                'efficiency_score': 50.0
+            },
+            'insights': ['📊 No recent data for this device - check connection'],
+            'recommendations': ['🔌 Ensure device is connected and collecting data']
+        }
+    
+    def _device_analysis(self, device_id: str, device_name: str, days: int, stats: Dict, insights: List[str]) -> Dict:
+        """Assemble the device analysis result"""
+        return {
+            'device_id': device_id,
+            'analysis_period_days': days,
+            'statistics': stats,
             'insights': insights,
-            'recommendations': self._generate_recommendations(device_id, df, stats)
+            'recommendations': self._generate_recommendations(device_id, device_name, stats)
         }
     
-    def analyze_home_energy(self, days: int = 7) -> Dict:
-        """Analyze overall home energy consumption"""
-        try:
-            all_readings = self.db.get_recent_readings(hours=days*24)
-            
-            if not all_readings:
-                # Return basic structure instead of error
-                return {
-                    "analysis_period_days": days,
-                    "total_devices": 7,
-                    "total_energy_kwh": 0.0,
-                    "total_cost": 0.0,
-                    "peak_hours": [18, 19, 20],
-                    "device_summary": {},
-                    "insights": ["🏠 No recent data available - start collecting energy data to see insights"],
-                    "recommendations": ["🔌 Connect your energy monitoring devices to begin analysis"]
-                }
-            
-            df = pd.DataFrame(all_readings)
-            
-            # Safely convert timestamp to datetime
-            try:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df['hour'] = df['timestamp'].dt.hour
-            except Exception:
-                # Fallback if timestamp conversion fails
-                df['hour'] = 12  # Default to noon
-        
-            # Group by device and time
-            device_summary = df.groupby('device_name').agg({
-                'power_watts': ['mean', 'max', 'sum'],
-                'cost': 'sum'
-            }).round(2)
-            
-            # Time-based analysis
-            hourly_usage = df.groupby('hour')['power_watts'].mean()
-            peak_hours = hourly_usage.nlargest(3).index.tolist()
-            
-            # Generate home-level insights
-            home_insights = self._generate_home_insights(df, device_summary, peak_hours)
-            
-            # Convert device_summary to a more JSON-friendly format
-            device_summary_dict = {}
-            for device in device_summary.index:
-                device_summary_dict[device] = {
-                    'avg_power_watts': device_summary.loc[device, ('power_watts', 'mean')],
-                    'max_power_watts': device_summary.loc[device, ('power_watts', 'max')],
-                    'total_power_sum': device_summary.loc[device, ('power_watts', 'sum')],
-                    'total_cost': device_summary.loc[device, ('cost', 'sum')]
-                }
-            
-            return {
-                'analysis_period_days': days,
-                'total_devices': df['device_name'].nunique(),
-                'total_energy_kwh': round(df['energy_kwh'].sum(), 4),
-                'total_cost': round(df['cost'].sum(), 4),
-                'peak_hours': peak_hours,
-                'device_summary': device_summary_dict,
-                'insights': home_insights,
-                'recommendations': self._generate_home_recommendations(df, device_summary)
-            }
-        except Exception as e:
-            # Return fallback data instead of error
-            return {
-                "analysis_period_days": days,
-                "total_devices": 7,
-                "total_energy_kwh": 0.0,
-                "total_cost": 0.0,
-                "peak_hours": [18, 19, 20],
-                "device_summary": {},
-                "insights": [f"⚠️ Analysis temporarily unavailable - collecting data..."],
-                "recommendations": ["🔄 Please try refreshing the page in a moment"]
-            }
+    def _device_stats_from_readings(self, device_id: str, readings: Dict[str, np.ndarray]) -> Tuple[str, Dict]:
+        """Turn a device's reading columns into (device_name, statistics)"""
+        device_name = readings['device_name'][0] or device_id
+        n = readings['timestamp'].size
+        
+        if n < FAST_PATH_MAX_READINGS:
+            stats = self._fast_path_stats(readings)
+        else:
+            stats = self._array_stats(readings)
+        
+        return device_name, stats
+    
+    def _array_stats(self, readings: Dict[str, np.ndarray]) -> Dict:
+        """Device statistics via flat NumPy arrays and the compiled stats kernel"""
+        # Derive hour / weekday straight from epoch seconds
+        seconds = readings['timestamp']
+        hour = ((seconds // 3600) % 24).astype(np.int8)
+        day_of_week = (seconds // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+        
+        # Calculate statistics
+        return self._calculate_device_stats(readings['power_watts'], readings['energy_kwh'], readings['cost'],
+                                            hour, day_of_week >= 5)
     
-    def _calculate_device_stats(self, df: pd.DataFrame) -> Dict:
-        """Calculate statistical measures for a device"""
+    def _fast_path_stats(self, readings: Dict[str, np.ndarray]) -> Dict:
+        """Device statistics for a handful of readings in one pure-Python walk"""
+        power = readings['power_watts'].tolist()
+        n = len(power)
+        
+        total = total_energy = total_cost = wk_sum = 0.0
+        wk_n = 0
+        hour_sums: Dict[int, float] = {}
+        hour_counts: Dict[int, int] = {}
+        for seconds, p, e, c in zip(readings['timestamp'].tolist(), power,
+                                    readings['energy_kwh'].tolist(), readings['cost'].tolist()):
+            total += p
+            total_energy += e
+            total_cost += c
+            if (seconds // 86400 + 3) % 7 >= 5:  # 1970-01-01 was a Thursday
+                wk_sum += p
+                wk_n += 1
+            h = (seconds // 3600) % 24
+            hour_sums[h] = hour_sums.get(h, 0.0) + p
+            hour_counts[h] = hour_counts.get(h, 0) + 1
+        
+        mean = total / n
+        var = sum((p - mean) ** 2 for p in power) / (n - 1) if n > 1 else 0.0
+        
+        # 10th percentile with linear interpolation, same as np.quantile
+        ordered = sorted(power)
+        pos = 0.1 * (n - 1)
+        lo = int(pos)
+        q10 = ordered[lo] + (ordered[min(lo + 1, n - 1)] - ordered[lo]) * (pos - lo)
+        
+        wd_n = n - wk_n
+        weekend_ratio = 1.0
+        if wk_n > 0 and wd_n > 0:
+            wd_mean = (total - wk_sum) / wd_n
+            if wd_mean > 0.0:
+                weekend_ratio = (wk_sum / wk_n) / wd_mean
+        
+        # Lowest hour wins ties, matching argmax over the 24 hour buckets
+        peak_hour = max(sorted(hour_sums), key=lambda h: hour_sums[h] / hour_counts[h])
+        # Readings above 10% of the mean, counted off the already-sorted list
+        usage_count = n - bisect.bisect_right(ordered, mean * 0.1)
+        
         return {
-            'avg_power_watts': df['power_watts'].mean(),
-            'max_power_watts': df['power_watts'].max(),
-            'min_power_watts': df['power_watts'].min(),
-            'total_energy_kwh': df['energy_kwh'].sum(),
-            'total_cost': df['cost'].sum(),
-            'usage_hours_per_day': len(df[df['power_watts'] > df['power_watts'].mean() * 0.1]) / 7,
-            'peak_usage_hour': df.groupby('hour')['power_watts'].mean().idxmax(),
-            'weekend_vs_weekday_ratio': self._calculate_weekend_ratio(df),
-            'efficiency_score': self._calculate_efficiency_score(df)
+            'avg_power_watts': mean,
+            'max_power_watts': float(ordered[-1]),
+            'min_power_watts': float(ordered[0]),
+            'total_energy_kwh': total_energy,
+            'total_cost': total_cost,
+            'usage_hours_per_day': usage_count / 7,
+            'peak_usage_hour': peak_hour,
+            'weekend_vs_weekday_ratio': round(float(weekend_ratio), 2),
+            'efficiency_score': self._calculate_efficiency_score(n, mean, var, q10)
         }
     
-    def _calculate_efficiency_score(self, df: pd.DataFrame) -> float:
-        """Calculate an efficiency score (0-100) based on usage patterns"""
-        import math
+    def _load_readings_df(self, hours: int) -> Optional[pd.DataFrame]:
+        """Recent readings as a DataFrame built from columnar arrays (None when empty)"""
+        columns = self.db.get_recent_readings_columnar(hours=hours)
+        if not columns['timestamp'].size:
+            return None
         
-        if df.empty or len(df) < 2:
-            return 50.0  # Default score for insufficient data
+        # Whole-column buffers instead of one dict per row; timestamps arrive as epoch
+        # seconds so there is no string parsing, and totals are summed in float64
+        return pd.DataFrame({
+            'device_id': columns['device_id'],
+            'device_name': columns['device_name'],
+            'timestamp': pd.to_datetime(columns['timestamp'], unit='s'),
+            'power_watts': columns['power_watts'].astype(np.float64),
+            'energy_kwh': columns['energy_kwh'].astype(np.float64),
+            'cost': columns['cost'].astype(np.float64),
+        })
+    
+    def _calculate_device_stats(self, power: np.ndarray, energy: np.ndarray, cost: np.ndarray,
+                                hour: np.ndarray, is_weekend: np.ndarray) -> Dict:
+        """Calculate statistical measures for a device in a single pass over the arrays"""
+        mean, var, q10, p_min, p_max, weekend_ratio, peak_hour, usage_count = device_stats_kernel(
+            power, hour, is_weekend)
         
-        try:
-            power_variance = df['power_watts'].var()
-            mean_power = df['power_watts'].mean()
-            
-            # Handle NaN or invalid values
-            if math.isnan(power_variance) or math.isnan(mean_power):
-                return 50.0
-            
-            # Lower variance relative to mean = more efficient usage
-            if mean_power > 0:
-                consistency_score = max(0, 100 - (power_variance / mean_power))
-            else:
-                consistency_score = 50
-            
-            # Handle NaN from calculation
-            if math.isnan(consistency_score):
-                consistency_score = 50
-            
-            # Penalize very high standby power
-            standby_power = df['power_watts'].quantile(0.1)
-            if math.isnan(standby_power):
-                standby_power = 0
-                
-            standby_penalty = min(20, standby_power / 10)  # Penalty for high standby
-            
-            efficiency = max(0, min(100, consistency_score - standby_penalty))
-            
-            # Final check for NaN
-            if math.isnan(efficiency):
-                return 50.0
-                
-            return round(float(efficiency), 1)
-            
-        except Exception:
-            return 50.0  # Safe fallback
+        return {
+            'avg_power_watts': float(mean),
+            'max_power_watts': float(p_max),
+            'min_power_watts': float(p_min),
+            'total_energy_kwh': float(energy.sum(dtype=np.float64)),
+            'total_cost': float(cost.sum(dtype=np.float64)),
+            'usage_hours_per_day': int(usage_count) / 7,
+            'peak_usage_hour': int(peak_hour),
+            'weekend_vs_weekday_ratio': round(float(weekend_ratio), 2),
+            'efficiency_score': self._calculate_efficiency_score(power.size, mean, var, q10)
+        }
     
-    def _calculate_weekend_ratio(self, df: pd.DataFrame) -> float:
-        """Calculate weekend vs weekday usage ratio safely"""
-        import math
+    def _calculate_efficiency_score(self, n: int, mean_power: float, power_variance: float,
+                                    standby_power: float) -> float:
+        """Calculate an efficiency score (0-100) based on usage patterns"""
+        if n < 2:
+            return 50.0  # Default score for insufficient data
         
-        try:
-            if df.empty or 'is_weekend' not in df.columns:
-                return 1.0
-            
-            weekend_data = df[df['is_weekend']]['power_watts']
-            weekday_data = df[~df['is_weekend']]['power_watts']
-            
-            if len(weekend_data) == 0 or len(weekday_data) == 0:
-                return 1.0
-            
-            weekend_mean = weekend_data.mean()
-            weekday_mean = weekday_data.mean()
-            
-            if math.isnan(weekend_mean) or math.isnan(weekday_mean) or weekday_mean == 0:
-                return 1.0
-            
-            ratio = weekend_mean / weekday_mean
-            
-            if math.isnan(ratio) or math.isinf(ratio):
-                return 1.0
-            
-            return round(float(ratio), 2)
-            
-        except Exception:
-            return 1.0
+        # Inputs come straight from the stats kernels and are finite by construction
+        # Lower variance relative to mean = more efficient usage
+        consistency_score = max(0, 100 - power_variance / mean_power) if mean_power > 0 else 50
+        
+        # Penalize very high standby power (10th percentile of readings)
+        standby_penalty = min(20, standby_power / 10)
+        
+        return round(float(max(0, min(100, consistency_score - standby_penalty))), 1)
     
-    def _generate_device_insights(self, device_id: str, df: pd.DataFrame, stats: Dict) -> List[str]:
+    def _generate_device_insights(self, device_id: str, device_name: str, stats: Dict) -> List[str]:
         """Generate AI-powered insights for a device"""
-        if self.use_mock_ai:
-            return self._mock_device_insights(device_id, df, stats)
+        if self.use_templates or self.use_mock_ai:
+            return self._mock_device_insights(device_id, device_name, stats)
+        elif self.background_insights:
+            return self._queue_device_insights([(device_id, device_name, stats)])[0]
         else:
-            return self._gpt_oss_device_insights(device_id, df, stats)
+            return self._gpt_oss_device_insights(device_id, device_name, stats)
+    
+    def _generate_device_insights_batch(self, devices: List[Tuple[str, str, Dict]]) -> List[List[str]]:
+        """Generate insights for several (device_id, device_name, stats) entries at once"""
+        if self.use_templates or self.use_mock_ai or self.model is None:
+            return [self._mock_device_insights(*device) for device in devices]
+        if self.background_insights:
+            return self._queue_device_insights(devices)
+        return self._gpt_oss_device_insights_batch(devices)
+    
+    def _queue_device_insights(self, devices: List[Tuple[str, str, Dict]]) -> List[List[str]]:
+        """Hand devices to the background worker; answer now with the last LLM result or the template"""
+        with self._insight_lock:
+            # Started under the lock - concurrent requests must never start a second worker
+            if self._insight_worker is None:
+                self._insight_worker = threading.Thread(target=self._insight_worker_loop, name="insight-worker",
+                                                        daemon=True)
+                self._insight_worker.start()
+            
+            for device in devices:
+                if device[0] not in self._insight_pending:
+                    self._insight_pending.add(device[0])
+                    self._insight_queue.put(device)
+            
+            cached = [list(self.insight_cache.get(device[0], ())) for device in devices]
+        
+        return [insights or self._mock_device_insights(*device) for device, insights in zip(devices, cached)]
+    
+    def _insight_worker_loop(self):
+        """Drain queued insight jobs in batches and store the LLM output per device"""
+        while True:
+            devices = [self._insight_queue.get()]
+            # Take whatever else is already waiting, up to one batch
+            while len(devices) < INSIGHT_BATCH_SIZE:
+                try:
+                    devices.append(self._insight_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                results = self._gpt_oss_device_insights_batch(devices)
+                with self._insight_lock:
+                    for (device_id, _, _), insights in zip(devices, results):
+                        self.insight_cache[device_id] = insights
+            except Exception as e:
+                logger.warning(f"Background insight generation failed: {e}")
+            finally:
+                with self._insight_lock:
+                    self._insight_pending.difference_update(device[0] for device in devices)
     
-    def _mock_device_insights(self, device_id: str, df: pd.DataFrame, stats: Dict) -> List[str]:
+    def _mock_device_insights(self, device_id: str, device_name: str, stats: Dict) -> List[str]:
         """Generate mock insights that simulate gpt-oss analysis - FAST VERSION"""
-        device_name = df['device_name'].iloc[0] if not df.empty else device_id
-        insights = []
+        device_name = device_name or device_id
         
         # Quick insights based on device type and power
         avg_power = stats['avg_power_watts']
-        efficiency = stats['efficiency_score']
         # Calculate realistic daily cost based on average power
-        daily_kwh = (avg_power * 24) / 1000  # Convert watts to daily kWh
-        daily_cost = daily_kwh * config.ELECTRICITY_RATE
-        
-        # Device-specific quick insights - simplified for laymen
-        # NOTE: Order matters! More specific patterns first to avoid false matches
-        device_lower = device_name.lower()
-        
-        if 'washing' in device_lower or 'washer' in device_lower or ('wash' in device_lower and 'machine' in device_lower):
-            insights.extend([
-                f"🧺 Your washing machine uses {avg_power:.0f} watts per cycle",
-                f"💰 Daily cost: ${daily_cost:.2f}",
-                "❄️ Use cold water for 90% energy savings - modern detergents work great in cold!"
-            ])
-        elif 'dishwasher' in device_lower:
-            insights.extend([
-                f"🍽️ Dishwasher uses {avg_power:.0f} watts per cycle",
-                f"💰 Daily cost: ${daily_cost:.2f}",
-                "💡 Skip heated dry - open door instead to save 15% energy per load"
-            ])
-        elif 'dryer' in device_lower or 'clothes dryer' in device_lower:
-            # Smart power-based dryer messages
-            if avg_power > 2500:
-                power_msg = f"👕 Your {device_name} uses {avg_power:.0f} watts - High power usage detected, consider shorter cycles"
-            elif avg_power > 500:
-                power_msg = f"👕 Your {device_name} uses {avg_power:.0f} watts - Normal operation, efficient drying cycle"
-            else:
-                power_msg = f"👕 Your {device_name} uses {avg_power:.0f} watts - Low power mode or cycle complete"
-            
-            insights.extend([
-                power_msg,
-                f"💰 Daily cost: ${daily_cost:.2f} (one of your highest energy users)",
-                f"🔥 {'Heavy usage detected' if stats['usage_hours_per_day'] > 2 else 'Moderate usage'} - clean lint filter for 30% better efficiency"
-            ])
-        elif 'water heater' in device_lower:
-            temp_f = 120
-            temp_c = round((temp_f - 32) * 5/9, 1)
-            insights.extend([
-                f"🚿 Water heater uses {avg_power:.0f} watts to keep water hot",
-                f"💰 Daily cost: ${daily_cost:.2f} (runs 24/7 to maintain temperature)",
-                f"🌡️ Set to {temp_f}°F ({temp_c}°C) - hot enough for safety, saves energy vs higher temps"
-            ])
-        elif 'air conditioning' in device_lower or 'air conditioner' in device_lower or (device_lower.startswith('ac ') or device_lower.endswith(' ac') or device_lower == 'ac'):
-            current_temp = 72  # Assume typical setting
-            save_temp = current_temp + 2
-            save_temp_c = round((save_temp - 32) * 5/9, 1)
-            insights.extend([
-                f"🌡️ AC system uses {avg_power:.0f} watts - {'Working very hard' if avg_power > 2000 else 'Normal operation'}",
-                f"💰 Daily cost: ${daily_cost:.2f} (likely your biggest energy expense)",
-                f"💡 Set to {save_temp}°F ({save_temp_c}°C) instead of {current_temp}°F to save 10-15% on bills"
-            ])
-        elif 'fridge' in device_lower or 'refrigerator' in device_lower:
-            temp_f = 37
-            temp_c = round((temp_f - 32) * 5/9, 1)
-            insights.extend([
-                f"❄️ Your fridge uses {avg_power:.0f} watts on average - {'Great! Very efficient' if avg_power < 150 else 'Higher than typical - may need maintenance'}",
-                f"💰 Costs about ${daily_cost:.2f} per day to run",
-                f"🌡️ Best temperature: {temp_f}°F ({temp_c}°C) for food safety and efficiency"
-            ])
-        elif 'tv' in device_lower or 'television' in device_lower:
-            insights.extend([
-                f"📺 Your TV uses {avg_power:.0f} watts - {'Excellent! Very energy efficient' if avg_power < 100 else 'Consider newer energy-saving model'}",
-                f"💰 Daily cost: about ${daily_cost:.2f}",
-                f"⏰ {'Good job keeping standby power low!' if avg_power < 50 else 'Tip: Use a power strip to cut standby power'}"
-            ])
-        elif 'computer' in device_lower or 'pc' in device_lower or 'laptop' in device_lower:
-            insights.extend([
-                f"🖥️ Your computer uses {avg_power:.0f} watts on average",
-                f"💰 Running cost: ${daily_cost:.2f} per day",
-                f"💡 {'Desktop system detected' if avg_power > 200 else 'Laptop or efficient system'} - sleep mode can save 80% energy"
-            ])
-        elif 'microwave' in device_lower:
-            insights.extend([
-                f"🔥 Microwave peak power: {stats['max_power_watts']:.0f} watts when cooking",
-                f"💰 Very low daily cost: ${daily_cost:.2f} (only uses power when cooking)",
-                "✅ One of your most efficient appliances - no standby power waste!"
-            ])
-            current_temp = 72  # Assume typical setting
-            save_temp = current_temp + 2
-            save_temp_c = round((save_temp - 32) * 5/9, 1)
-            insights.extend([
-                f"🌡️ AC system uses {avg_power:.0f} watts - {'Working very hard' if avg_power > 2000 else 'Normal operation'}",
-                f"💰 Daily cost: ${daily_cost:.2f} (likely your biggest energy expense)",
-                f"💡 Set to {save_temp}°F ({save_temp_c}°C) instead of {current_temp}°F to save 10-15% on bills"
-            ])
-        elif 'heater' in device_lower or 'heating' in device_lower:
-            insights.extend([
-                f"🔥 Heater uses {avg_power:.0f} watts when running",
-                f"💰 Daily heating cost: ${daily_cost:.2f}",
-                "🌡️ Lower by just 1°F (0.5°C) to save 5% on heating bills"
-            ])
-        elif 'water heater' in device_lower:
-            temp_f = 120
-            temp_c = round((temp_f - 32) * 5/9, 1)
-            insights.extend([
-                f"🚿 Water heater uses {avg_power:.0f} watts to keep water hot",
-                f"💰 Daily cost: ${daily_cost:.2f} (runs 24/7 to maintain temperature)",
-                f"🌡️ Set to {temp_f}°F ({temp_c}°C) - hot enough for safety, saves energy vs higher temps"
-            ])
-        elif 'dishwasher' in device_lower:
-            insights.extend([
-                f"🍽️ Dishwasher uses {avg_power:.0f} watts per cycle",
-                f"💰 Daily cost: ${daily_cost:.2f}",
-                "💡 Skip heated dry - open door instead to save 15% energy per load"
-            ])
-        elif 'oven' in device_lower:
-            insights.extend([
-                f"🍳 Oven uses {avg_power:.0f} watts when cooking",
-                f"💰 Daily cost: ${daily_cost:.2f}",
-                "🔥 Very efficient for cooking multiple items at once - batch your baking!"
-            ])
-        else:
-            # Generic insights - simplified
-            insights.extend([
-                f"⚡ This device uses {avg_power:.0f} watts on average",
-                f"💰 Daily cost: about ${daily_cost:.2f}",
-                f"📊 Efficiency rating: {efficiency:.0f}/100 {'(Good!)' if efficiency > 60 else '(Could be better)'}"
-            ])
+        daily_cost = avg_power * DAILY_RATE
+        
+        category = _classify_device(device_name)
+        insights = DEVICE_INSIGHTS[category](device_name, avg_power, daily_cost, stats)
         
         return insights[:3]  # Return top 3 for speed
     
-    def _generate_recommendations(self, device_id: str, df: pd.DataFrame, stats: Dict) -> List[str]:
+    def _generate_recommendations(self, device_id: str, device_name: str, stats: Dict) -> List[str]:
         """Generate actionable recommendations - FAST VERSION"""
-        device_name = df['device_name'].iloc[0] if not df.empty else device_id
-        avg_power = stats['avg_power_watts']
-        device_lower = device_name.lower()
-        
-        # Quick device-specific recommendations - simplified for laymen
-        # NOTE: Order matters! More specific patterns first to avoid false matches
-        if 'washing' in device_lower or 'washer' in device_lower or ('wash' in device_lower and 'machine' in device_lower):
-            return [
-                "❄️ Use cold water for 90% of loads - modern detergents work great!",
-                "👕 Wash full loads when possible - same energy for more clothes",
-                "🌀 Use high-speed spin to remove more water before drying"
-            ]
-        elif 'dishwasher' in device_lower:
-            return [
-                "🌬️ Skip 'Heated Dry' - just open door when done, saves 15% per load",
-                "🍽️ Run only full loads - same energy whether half or completely full",
-                "💧 Use 'Eco' or 'Energy Saver' cycle when dishes aren't very dirty"
-            ]
-        elif 'dryer' in device_lower or 'clothes dryer' in device_lower:
-            return [
-                "🧹 Clean lint filter before EVERY load - improves efficiency by 30%",
-                "👕 Don't over-dry clothes - use moisture sensor if available",
-                "🌬️ Clean dryer vent outside annually - blocked vents waste huge energy",
-                "🔥 Dry full loads but don't overpack - clothes need room to tumble"
-            ]
-        elif 'water heater' in device_lower:
-            temp_f = 120
-            temp_c = round((temp_f - 32) * 5/9, 1)
-            return [
-                f"🌡️ Set temperature to {temp_f}°F ({temp_c}°C) - safe and efficient",
-                "🚿 Take shorter showers - each minute saves significant energy",
-                "🔧 Insulate hot water pipes to reduce heat loss"
-            ]
-        elif 'air conditioning' in device_lower or 'air conditioner' in device_lower or (device_lower.startswith('ac ') or device_lower.endswith(' ac') or device_lower == 'ac'):
-            return [
-                "🌡️ Raise temperature by just 2°F (1°C) - you won't notice but will save 10-15%",
-                "🔧 Change air filter monthly - dirty filters make AC work harder",
-                "🌬️ Use ceiling fans to feel cooler at higher temperatures"
-            ]
-        elif 'tv' in device_lower or 'television' in device_lower:
-            return [
-                "💡 Turn on 'Eco Mode' in settings - saves 20-30% energy automatically",
-                "⏰ Set sleep timer so TV doesn't run all night",
-                "🔌 Use a power strip to completely cut power when not watching"
-            ]
-        elif 'computer' in device_lower or 'pc' in device_lower or 'laptop' in device_lower:
-            return [
-                "💤 Set computer to sleep after 15 minutes of inactivity",
-                "🖥️ Turn off monitor separately - it uses lots of power",
-                "⚙️ Use 'Power Saver' mode in Windows settings"
-            ]
-        elif 'fridge' in device_lower or 'refrigerator' in device_lower:
-            temp_f = 37
-            temp_c = round((temp_f - 32) * 5/9, 1)
-            return [
-                f"🌡️ Set fridge to {temp_f}°F ({temp_c}°C) - perfect for food safety and efficiency",
-                "🧽 Clean the coils on the back/bottom every 6 months",
-                "🚪 Check door seals - should hold a dollar bill tightly when closed"
-            ]
-        elif 'microwave' in device_lower:
-            return [
-                "✅ Already very efficient - only uses power when cooking",
-                "🔌 Unplug when not in use to save a few watts of standby power",
-                "🍽️ Use for reheating instead of oven - much more efficient"
-            ]
-
-        elif 'oven' in device_lower:
-            return [
-                "🍳 Cook multiple items at once - very efficient for batch cooking",
-                "🔥 Don't preheat longer than needed - most foods don't need it",
-                "🚪 Keep door closed while cooking - each peek loses 25°F (14°C)"
-            ]
-        elif 'heater' in device_lower or 'heating' in device_lower:
-            return [
-                "🌡️ Lower temperature by 1°F (0.5°C) - saves 5% on heating bills",
-                "🔧 Change furnace filter monthly during heating season",
-                "🏠 Close vents in unused rooms to focus heat where needed"
-            ]
-        else:
-            return [
-                "⚡ Look for 'Energy Saver' or 'Eco' modes in device settings",
-                "🔌 Use smart plugs to automatically turn off when not needed",
-                "📊 Monitor usage patterns to find opportunities to save"
-            ]
-    
-    def _generate_home_insights(self, df: pd.DataFrame, device_summary: pd.DataFrame, peak_hours: List[int]) -> List[str]:
-        """Generate home-level insights"""
-        insights = []
-        
-        total_cost = df['cost'].sum()
-        total_kwh = df['energy_kwh'].sum()
-        
-        # Peak usage insights
-        peak_hours_str = ", ".join([f"{h}:00" for h in peak_hours])
-        insights.append(f"🏠 Your home's peak energy usage occurs at {peak_hours_str}")
-        
-        # Cost insights - Calculate realistic monthly estimate
-        # Get average power consumption and extrapolate to monthly usage
-        avg_power_watts = df['power_watts'].mean()
-        # Assume devices run similar patterns daily
-        daily_kwh = (avg_power_watts * 24) / 1000  # Convert watts to daily kWh
-        monthly_kwh = daily_kwh * 30
-        monthly_estimate = monthly_kwh * config.ELECTRICITY_RATE
-        insights.append(f"💰 Estimated monthly electricity cost: ${monthly_estimate:.2f} based on current usage")
-        
-        # Device contribution insights
-        # This would work better with the actual device_summary structure
-        insights.append(f"⚡ Total energy consumption: {total_kwh:.2f} kWh over the analysis period")
-        
-        # Usage pattern insights
-        weekend_usage = df[df['timestamp'].dt.dayofweek >= 5]['power_watts'].mean()
-        weekday_usage = df[df['timestamp'].dt.dayofweek < 5]['power_watts'].mean()
-        
-        if weekend_usage > weekday_usage * 1.2:
-            insights.append("📈 Weekend energy usage is significantly higher than weekdays")
-        elif weekend_usage < weekday_usage * 0.8:
-            insights.append("📉 Weekday energy usage is higher - likely due to work-from-home activities")
-        
-        return insights
+        category = _classify_device(device_name or device_id)
+        return list(DEVICE_RECOMMENDATIONS[category])
     
-    def _generate_home_recommendations(self, df: pd.DataFrame, device_summary: pd.DataFrame) -> List[str]:
-        """Generate home-level recommendations - simplified for laymen"""
-        recommendations = []
-        
-        # Calculate realistic monthly estimate
-        avg_power_watts = df['power_watts'].mean()
-        daily_kwh = (avg_power_watts * 24) / 1000  # Convert watts to daily kWh
-        monthly_kwh = daily_kwh * 30
-        monthly_estimate = monthly_kwh * config.ELECTRICITY_RATE
-        
-        # High-level recommendations based on cost
-        if monthly_estimate > 240:  # $8/day * 30 days
-            recommendations.append(f"💰 Your ${monthly_estimate:.0f}/month electricity is high - biggest savings: AC/heating, water heater, dryer")
-        elif monthly_estimate > 150:  # $5/day * 30 days
-            recommendations.append(f"💡 Your ${monthly_estimate:.0f}/month electricity could be lower - focus on your biggest energy users first")
-        
-        # Practical recommendations
-        recommendations.append("🔌 Unplug devices when not in use - 'phantom loads' can add $100+ per year")
-        recommendations.append("💡 Switch to LED bulbs if you haven't - they use 75% less energy than old bulbs")
-        
-        # Seasonal recommendations - simplified
-        month = datetime.now().month
-        if month in [6, 7, 8]:  # Summer
-            recommendations.append("🌬️ Summer tip: Use fans and raise AC to 78°F (26°C) - you'll barely notice but save big")
-        elif month in [12, 1, 2]:  # Winter
-            temp_f = 68
-            temp_c = round((temp_f - 32) * 5/9, 1)
-            recommendations.append(f"🔥 Winter tip: Set heat to {temp_f}°F ({temp_c}°C) and wear a sweater - saves 10% per degree")
-        elif month in [3, 4, 5, 9, 10, 11]:  # Spring/Fall
-            recommendations.append("🌤️ Great weather for opening windows instead of using AC or heat!")
-        
-        return recommendations[:4]
-    
-    def _gpt_oss_device_insights(self, device_id: str, df: pd.DataFrame, stats: Dict) -> List[str]:
+    def _gpt_oss_device_insights(self, device_id: str, device_name: str, stats: Dict) -> List[str]:
         """Generate insights using actual gpt-oss model"""
         if self.model is None or self.use_mock_ai:
-            return self._mock_device_insights(device_id, df, stats)
+            return self._mock_device_insights(device_id, device_name, stats)
         
         try:
-            prompt = self._create_analysis_prompt(device_id, df, stats)
-            
-            # Tokenize input
-            inputs = self.tokenizer.encode(prompt, return_tensors="pt")
-            if hasattr(self, 'device'):
-                inputs = inputs.to(self.device)
-            
-            # Generate response with gpt-oss
             if not TORCH_AVAILABLE:
                 raise ImportError("torch not available")
             
-            with torch.no_grad():
+            # Only the six numbers need tokenizing - prefix, device header and suffix ids are cached
+            stats_ids = self.tokenizer.encode(
+                self._create_stats_block(stats), return_tensors="pt", add_special_tokens=False
+            ).to(self._prefix_ids.device)
+            inputs = torch.cat([
+                self._prefix_ids,
+                self._header_ids(device_name or device_id),
+                stats_ids,
+                self._suffix_ids,
+            ], dim=1)
+            
+            # generate() extends the cache in place, so each call gets its own copy of the prefix cache.
+            # Without one (quantized KV cache enabled, or priming failed) generate() builds its own cache.
+            if self._kv_cache is not None:
+                cache_kwargs = {'past_key_values': copy.deepcopy(self._kv_cache)}
+            else:
+                cache_kwargs = self._cache_kwargs
+            
+            # Generate response with gpt-oss
+            with torch.inference_mode():
                 outputs = self.model.generate(
                     inputs,
-                    max_length=inputs.shape[1] + 200,  # Add 200 tokens for response
-                    temperature=0.7,
-                    do_sample=True,
                     pad_token_id=self.tokenizer.eos_token_id,
-                    num_return_sequences=1
+                    **cache_kwargs,
+                    **GENERATION_KWARGS
                 )
             
-            # Decode response
-            response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Extract just the generated part (after the prompt)
-            generated_text = response[len(prompt):].strip()
+            # Decode just the generated part (after the prompt)
+            generated_text = self.tokenizer.decode(outputs[0, inputs.shape[1]:], skip_special_tokens=True).strip()
             
             # Parse the AI response into insights
             insights = self._parse_ai_response(generated_text)
             
-            return insights if insights else self._mock_device_insights(device_id, df, stats)
+            return insights if insights else self._mock_device_insights(device_id, device_name, stats)
             
         except Exception as e:
             logger.warning(f"Error generating gpt-oss insights: {e}")
-            return self._mock_device_insights(device_id, df, stats)
+            return self._mock_device_insights(device_id, device_name, stats)
     
-    def _create_analysis_prompt(self, device_id: str, df: pd.DataFrame, stats: Dict) -> str:
-        """Create a prompt for gpt-oss analysis"""
-        device_name = df['device_name'].iloc[0] if not df.empty else device_id
-        
-        prompt = f"""
-        Analyze the energy consumption data for {device_name}:
-        
-        Statistics:
-        - Average power: {stats['avg_power_watts']:.1f}W
-        - Peak power: {stats['max_power_watts']:.1f}W
-        - Total energy: {stats['total_energy_kwh']:.2f} kWh
-        - Peak usage hour: {stats['peak_usage_hour']}:00
-        - Efficiency score: {stats['efficiency_score']}/100
-        - Weekend vs weekday ratio: {stats['weekend_vs_weekday_ratio']:.2f}
+    def _gpt_oss_device_insights_batch(self, devices: List[Tuple[str, str, Dict]]) -> List[List[str]]:
+        """Generate insights for all devices with one left-padded generate call"""
+        if not devices:
+            return []
         
-        Provide 3-4 specific insights about this device's energy usage patterns and efficiency.
-        Focus on actionable observations that help the user understand their energy consumption.
-        """
+        try:
+            if not TORCH_AVAILABLE:
+                raise ImportError("torch not available")
+            
+            prompts = [self._create_analysis_prompt(*device) for device in devices]
+            
+            # Left padding keeps every prompt flush against its generated tokens
+            self.tokenizer.padding_side = 'left'
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            inputs = self.tokenizer(prompts, return_tensors="pt", padding=True)
+            if hasattr(self, 'device'):
+                inputs = inputs.to(self.device)
+            
+            # The single-sequence prefix cache can't line up with padded rows, so prefill in full here
+            with torch.inference_mode():
+                outputs = self.model.generate(
+                    **inputs,
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    **self._cache_kwargs,
+                    **GENERATION_KWARGS
+                )
+            
+            # Every row shares the padded prompt length, so one slice splits prompt from response
+            responses = self.tokenizer.batch_decode(outputs[:, inputs['input_ids'].shape[1]:], skip_special_tokens=True)
+            
+            return [
+                self._parse_ai_response(response.strip()) or self._mock_device_insights(*device)
+                for device, response in zip(devices, responses)
+            ]
+            
+        except Exception as e:
+            logger.warning(f"Error generating batched gpt-oss insights: {e}")
+            return [self._mock_device_insights(*device) for device in devices]
+    
+    def _create_analysis_prompt(self, device_id: str, device_name: str, stats: Dict) -> str:
+        """Create a prompt for gpt-oss analysis"""
+        return (ANALYSIS_PROMPT_PREFIX
+                + self._create_device_header(device_name or device_id)
+                + self._create_stats_block(stats)
+                + ANALYSIS_PROMPT_SUFFIX)
+    
+    def _create_device_header(self, device_name: str) -> str:
+        """Per-device line that follows ANALYSIS_PROMPT_PREFIX"""
+        return f"\nAnalyze the energy consumption data for {device_name}:\n\nStatistics:\n"
+    
+    def _encode_device_header(self, device_name: str):
+        """Token ids for a device header (memoized per device name in self._header_ids)"""
+        return self.tokenizer.encode(
+            self._create_device_header(device_name), return_tensors="pt", add_special_tokens=False
+        ).to(self._prefix_ids.device)
+    
+    def _create_stats_block(self, stats: Dict) -> str:
+        """The numeric part of the prompt - the only text tokenized on every call"""
+        prompt = (
+            f"- Average power: {stats['avg_power_watts']:.1f}W\n"
+            f"- Peak power: {stats['max_power_watts']:.1f}W\n"
+            f"- Total energy: {stats['total_energy_kwh']:.2f} kWh\n"
+            f"- Peak usage hour: {stats['peak_usage_hour']}:00\n"
+            f"- Efficiency score: {stats['efficiency_score']}/100\n"
+            f"- Weekend vs weekday ratio: {stats['weekend_vs_weekday_ratio']:.2f}\n"
+        )
         
         return prompt
     
@@ -664,12 +1049,11 @@ class EnergyAIAnalyzer:
             insights = []
             for line in lines:
                 # Look for bullet points, numbered items, or sentences
-                if line.startswith(('•', '-', '*', '1.', '2.', '3.', '4.')):
-                    # Remove bullet point markers
-                    clean_line = line.lstrip('•-*1234567890. ').strip()
-                    if clean_line and len(clean_line) > 10:  # Minimum meaningful length
-                        insights.append(clean_line)
-                elif len(line) > 20 and '.' in line:  # Complete sentences
+                bullet = AI_BULLET_RE.match(line)
+                if bullet:
+                    if len(bullet.group(1)) > 10:  # Minimum meaningful length
+                        insights.append(bullet.group(1))
+                elif AI_SENTENCE_RE.match(line):  # Complete sentences
                     insights.append(line)
             
             # Limit to top 4 insights
@@ -683,9 +1067,9 @@ class EnergyAIAnalyzer:
         """Generate a daily energy report with AI insights"""
         try:
             yesterday = datetime.now() - timedelta(days=1)
-            readings = self.db.get_recent_readings(hours=24)
+            df = self._load_readings_df(hours=24)
             
-            if not readings:
+            if df is None:
                 today = datetime.now().strftime('%Y-%m-%d')
                 return {
                     'summary': {
@@ -699,38 +1083,30 @@ class EnergyAIAnalyzer:
                     'recommendations': ['🚀 Begin energy monitoring to track daily usage']
                 }
             
-            df = pd.DataFrame(readings)
-            
-            # Safely convert timestamp to datetime
-            try:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-            except Exception:
-                pass  # Continue without datetime conversion
-            
-            # Clean numeric values
-            import math
-            def clean_value(val):
-                if isinstance(val, (int, float)):
-                    if math.isnan(val) or math.isinf(val):
-                        return 0.0
-                    return float(val)
-                return val
+            # Clean numeric values - one vectorized pass over the three columns
+            energy, cost, power = np.nan_to_num(
+                df[['energy_kwh', 'cost', 'power_watts']].to_numpy(dtype=np.float64),
+                nan=0.0, posinf=0.0, neginf=0.0
+            ).T
             
             # Daily summary with cleaned values
             daily_summary = {
                 'date': yesterday.strftime('%Y-%m-%d'),
-                'total_energy_kwh': clean_value(df['energy_kwh'].sum()),
-                'total_cost': clean_value(df['cost'].sum()),
-                'peak_power_watts': clean_value(df['power_watts'].max()),
-                'average_power_watts': clean_value(df['power_watts'].mean())
+                'total_energy_kwh': float(energy.sum()),
+                'total_cost': float(cost.sum()),
+                'peak_power_watts': float(power.max()),
+                'average_power_watts': float(power.mean())
             }
             
-            # Device rankings
-            device_costs = df.groupby('device_name')['cost'].sum().sort_values(ascending=False)
-            top_consumers = {k: clean_value(v) for k, v in device_costs.head(3).to_dict().items()}
+            # Device rankings - partial selection instead of a full sort; costs are already finite
+            device_costs = df.groupby('device_name', sort=False, observed=True)['cost'].sum()
+            top_consumers = device_costs.nlargest(3).to_dict()
+            
+            # Hourly mean power, computed once and shared with the insights
+            hourly_mean = _hourly_mean_power(df['timestamp'].dt.hour.to_numpy(), power)
             
             # Generate insights for the day
-            daily_insights = self._generate_daily_insights(df, daily_summary, top_consumers)
+            daily_insights = self._generate_daily_insights(df, daily_summary, top_consumers, hourly_mean)
             
             return {
                 'summary': daily_summary,
@@ -740,7 +1116,6 @@ class EnergyAIAnalyzer:
             }
             
         except Exception as e:
-            from datetime import datetime
             today = datetime.now().strftime('%Y-%m-%d')
             return {
                 'summary': {
@@ -755,7 +1130,8 @@ class EnergyAIAnalyzer:
             }
     
     
-    def _generate_daily_insights(self, df: pd.DataFrame, summary: Dict, top_consumers: Dict) -> List[str]:
+    def _generate_daily_insights(self, df: pd.DataFrame, summary: Dict, top_consumers: Dict,
+                                 hourly_mean: Optional[np.ndarray] = None) -> List[str]:
         """Generate insights for daily report - simplified for laymen"""
         insights = []
         
@@ -773,10 +1149,12 @@ class EnergyAIAnalyzer:
         
         # Usage pattern insight - with proper datetime handling
         try:
-            # Ensure timestamp is datetime
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                peak_hour = df.groupby(df['timestamp'].dt.hour)['power_watts'].mean().idxmax()
+            # Timestamps arrive already converted by _load_readings_df
+            if hourly_mean is None and 'timestamp' in df.columns:
+                hourly_mean = _hourly_mean_power(df['timestamp'].dt.hour.to_numpy(),
+                                                 df['power_watts'].to_numpy(dtype=np.float64))
+            if hourly_mean is not None:
+                peak_hour = int(hourly_mean.argmax())
                 
                 # Convert to 12-hour format for easier understanding
                 if peak_hour == 0:
@@ -813,13 +1191,7 @@ class EnergyAIAnalyzer:
         recommendations.append("🔍 Check which devices ran the longest - those are your best opportunities to save")
         
         # Add seasonal tip
-        month = datetime.now().month
-        if month in [6, 7, 8]:  # Summer
-            recommendations.append("🌡️ Hot weather tip: Every degree you raise the AC saves 6-8% on cooling costs")
-        elif month in [12, 1, 2]:  # Winter
-            recommendations.append("🔥 Cold weather tip: Lower the heat by 1°F when sleeping or away from home")
-        else:
-            recommendations.append("🌤️ Nice weather - perfect time to give your AC and heater a break!")
+        recommendations.append(DAILY_SEASONAL_TIPS[SEASON_BY_MONTH[time.localtime().tm_mon]])
         
         return recommendations
 
@@ -830,24 +1202,23 @@ class EnergyAIAnalyzer:
             current_month = current_date.month
             current_year = current_date.year
             
-            # Get data for current month
+            # Previous months to look at (up to 12 months back), counted as year*12 + (month-1)
+            base = current_year * 12 + current_month - 1
+            past_months = [(year, index + 1) for year, index in (divmod(base - i, 12) for i in range(1, 13))]
+            
+            # The current month is still changing - it is the only lookup that is never cached, so
+            # after the first call this is one query on the calling thread's connection
             current_month_data = self._get_month_data(current_year, current_month)
+            past_data = [self._get_closed_month_data(year, month) for year, month in past_months]
             
             # Get data for previous months (up to 12 months back)
             historical_months = []
-            for i in range(1, 13):  # Look back up to 12 months
-                month = current_month - i
-                year = current_year
-                if month <= 0:
-                    month += 12
-                    year -= 1
-                
-                month_data = self._get_month_data(year, month)
+            for (year, month), month_data in zip(past_months, past_data):
                 if month_data['total_kwh'] > 0:  # Only include months with data
                     historical_months.append({
                         'year': year,
                         'month': month,
-                        'month_name': datetime(year, month, 1).strftime('%B'),
+                        'month_name': MONTH_NAMES[month - 1],
                         'data': month_data
                     })
                 
@@ -860,7 +1231,7 @@ class EnergyAIAnalyzer:
             
             return {
                 'current_month': {
-                    'name': current_date.strftime('%B'),
+                    'name': MONTH_NAMES[current_month - 1],
                     'year': current_year,
                     'data': current_month_data
                 },
@@ -873,7 +1244,6 @@ class EnergyAIAnalyzer:
             }
             
         except Exception as e:
-            from datetime import datetime
             current_date = datetime.now()
             return {
                 'current_month': {
@@ -902,56 +1272,58 @@ class EnergyAIAnalyzer:
             }
     
     def _get_month_data(self, year: int, month: int) -> Dict:
-        """Get aggregated data for a specific month"""
+        """Get aggregated data for a specific month (all zeros if it can't be read)"""
         try:
-            # Get all readings for the month using recent readings (simplified for demo)
-            readings = self.db.get_recent_readings(hours=24 * 30)  # Last 30 days as proxy
-            
-            if not readings:
-                return {
-                    'total_kwh': 0,
-                    'total_cost': 0,
-                    'avg_daily_kwh': 0,
-                    'peak_power': 0,
-                    'active_devices': 0,
-                    'top_consumers': {}
-                }
-            
-            df = pd.DataFrame(readings)
-            
-            # Calculate monthly totals
-            total_kwh = df['energy_kwh'].sum()
-            total_cost = df['cost'].sum()
-            peak_power = df['power_watts'].max()
-            
-            # Calculate daily average
-            avg_daily_kwh = total_kwh / 30  # Simplified
-            
-            # Get active devices count
-            active_devices = df['device_id'].nunique()
-            
-            # Top consumers
-            device_costs = df.groupby('device_name')['cost'].sum().sort_values(ascending=False)
-            top_consumers = device_costs.head(5).to_dict()
-            
-            return {
-                'total_kwh': round(total_kwh, 2),
-                'total_cost': round(total_cost, 2),
-                'avg_daily_kwh': round(avg_daily_kwh, 2),
-                'peak_power': round(peak_power, 1),
-                'active_devices': active_devices,
-                'top_consumers': top_consumers
-            }
-            
-        except Exception as e:
-            return {
-                'total_kwh': 0,
-                'total_cost': 0,
-                'avg_daily_kwh': 0,
-                'peak_power': 0,
-                'active_devices': 0,
-                'top_consumers': {}
-            }
+            return self._load_month_data(year, month)
+        except Exception:
+            return self._empty_month_data()
+    
+    def _get_closed_month_data(self, year: int, month: int) -> Dict:
+        """Aggregated data for a finished month, from the cache once it has been read successfully"""
+        try:
+            return copy.deepcopy(self._closed_month_cache(year, month))
+        except Exception:
+            return self._empty_month_data()
+    
+    def _load_month_data(self, year: int, month: int) -> Dict:
+        """Aggregate a month's readings - database errors propagate to the caller"""
+        # SQLite returns one pre-aggregated row per device, most expensive first
+        devices = self.db.get_monthly_aggregates(year, month)
+        
+        if not devices:
+            return self._empty_month_data()
+        
+        # Calculate monthly totals
+        total_kwh = sum(d['total_kwh'] for d in devices)
+        total_cost = sum(d['total_cost'] for d in devices)
+        peak_power = max(d['peak_power'] for d in devices)
+        
+        # Calculate daily average
+        avg_daily_kwh = total_kwh / 30  # Simplified
+        
+        # Top consumers
+        top_consumers = {d['device_name']: round(d['total_cost'], 2) for d in devices[:5]}
+        
+        return {
+            'total_kwh': round(total_kwh, 2),
+            'total_cost': round(total_cost, 2),
+            'avg_daily_kwh': round(avg_daily_kwh, 2),
+            'peak_power': round(peak_power, 1),
+            'active_devices': len(devices),
+            'top_consumers': top_consumers
+        }
+    
+    @staticmethod
+    def _empty_month_data() -> Dict:
+        """Month summary with no readings"""
+        return {
+            'total_kwh': 0,
+            'total_cost': 0,
+            'avg_daily_kwh': 0,
+            'peak_power': 0,
+            'active_devices': 0,
+            'top_consumers': {}
+        }
     
     def _generate_monthly_insights(self, current_data: Dict, historical_months: List[Dict]) -> Dict:
         """Generate AI insights based on current and historical data - SUPER SIMPLE for laymen"""
@@ -1020,13 +1392,14 @@ class EnergyAIAnalyzer:
             # ADVANCED 6+ MONTH ANALYSIS
             last_month = historical_months[0]
             
-            # Calculate 6-month average
-            six_month_costs = [m['data']['total_cost'] for m in historical_months[:6]]
-            avg_6_month_cost = sum(six_month_costs) / 6
+            # One cost array (most recent month first) - every average below is a slice of it
+            costs = np.fromiter((m['data']['total_cost'] for m in historical_months), dtype=np.float64, count=len(historical_months))
+            avg_6_month_cost = float(costs[:6].mean())
             
             # Seasonal analysis - compare same season from previous year if available
             current_season = self._get_season(datetime.now().month)
-            seasonal_months = [m for m in historical_months if self._get_season(m['month']) == current_season]
+            months = np.fromiter((m['month'] for m in historical_months), dtype=np.int64, count=len(historical_months))
+            seasonal_costs = costs[SEASON_ARRAY[(months - 1) % 12] == current_season]
             
             comparison = {
                 'last_month_name': last_month['month_name'],
@@ -1034,12 +1407,12 @@ class EnergyAIAnalyzer:
                 'change_percent': round(((projected_cost - avg_6_month_cost) / avg_6_month_cost) * 100, 1) if avg_6_month_cost > 0 else 0,
                 'change_direction': 'increase' if projected_cost > avg_6_month_cost else 'decrease',
                 'months_of_data': len(historical_months),
-                'seasonal_data': len(seasonal_months)
+                'seasonal_data': len(seasonal_costs)
             }
             
             # Advanced insights with 6+ months
-            if seasonal_months and len(seasonal_months) >= 2:
-                seasonal_avg = sum(m['data']['total_cost'] for m in seasonal_months) / len(seasonal_months)
+            if len(seasonal_costs) >= 2:
+                seasonal_avg = float(seasonal_costs.mean())
                 seasonal_change = ((projected_cost - seasonal_avg) / seasonal_avg) * 100 if seasonal_avg > 0 else 0
                 
                 if abs(seasonal_change) > 20:
@@ -1048,8 +1421,8 @@ class EnergyAIAnalyzer:
                     insights.append(f"🌡️ Your {current_season} usage is consistent with last year - great predictability!")
             
             # Trend analysis
-            recent_3_months = sum(m['data']['total_cost'] for m in historical_months[:3]) / 3
-            older_3_months = sum(m['data']['total_cost'] for m in historical_months[3:6]) / 3
+            recent_3_months = float(costs[:3].mean())
+            older_3_months = float(costs[3:6].mean())
             trend = ((recent_3_months - older_3_months) / older_3_months) * 100 if older_3_months > 0 else 0
             
             if abs(trend) > 15:
@@ -1064,9 +1437,9 @@ class EnergyAIAnalyzer:
             predictions.append(f"🔮 With {len(historical_months)} months of data, I can predict your next 3 months will cost ${projected_cost * 3:.0f}")
             
             # Peak usage insights
-            peak_months = sorted(historical_months, key=lambda x: x['data']['total_cost'], reverse=True)[:2]
-            if peak_months:
-                peak_month_names = [m['month_name'] for m in peak_months]
+            peak_months = np.argsort(-costs, kind='stable')[:2]  # stable, so ties keep the more recent month
+            if peak_months.size:
+                peak_month_names = [historical_months[i]['month_name'] for i in peak_months]
                 predictions.append(f"⚡ Your highest usage months were {' and '.join(peak_month_names)} - plan ahead for similar periods")
                 
         elif len(historical_months) >= 3:
@@ -1149,21 +1522,19 @@ class EnergyAIAnalyzer:
     
     def _get_season(self, month: int) -> str:
         """Get season name from month number"""
-        if month in [12, 1, 2]:
-            return "winter"
-        elif month in [3, 4, 5]:
-            return "spring"
-        elif month in [6, 7, 8]:
-            return "summer"
-        else:  # 9, 10, 11
-            return "fall"
+        return SEASON_ARRAY[(month - 1) % 12]
     
     def analyze_home_energy(self, days: int = 7) -> Dict:
+        """Analyze home-wide energy patterns (cached for ANALYSIS_CACHE_TTL seconds)"""
+        bucket = int(time.time() // ANALYSIS_CACHE_TTL)
+        return copy.deepcopy(self._home_analysis_cache(days, bucket))
+    
+    def _analyze_home_energy(self, days: int = 7, bucket: int = 0) -> Dict:
         """Analyze home-wide energy patterns"""
         try:
-            readings = self.db.get_recent_readings(hours=days * 24)
+            df = self._load_readings_df(hours=days * 24)
             
-            if not readings:
+            if df is None:
                 return {
                     'error': 'No data available for home analysis',
                     'total_devices': 0,
@@ -1175,30 +1546,43 @@ class EnergyAIAnalyzer:
                     'recommendations': ['Begin monitoring your devices for personalized recommendations']
                 }
             
-            df = pd.DataFrame(readings)
+            df['device_id'] = df['device_id'].astype('category')
+            devices = df['device_id'].cat.categories
+            codes = df['device_id'].cat.codes.to_numpy()
+            power = df['power_watts'].to_numpy(dtype=np.float64)
+            energy = df['energy_kwh'].to_numpy(dtype=np.float64)
+            cost = df['cost'].to_numpy(dtype=np.float64)
             
-            # Calculate summary statistics
-            total_energy = df['energy_kwh'].sum()
-            total_cost = df['cost'].sum()
-            total_devices = df['device_id'].nunique()
+            # Calculate summary statistics (as Python floats, so the result serializes without conversion)
+            total_energy = float(energy.sum())
+            total_cost = float(cost.sum())
+            total_devices = len(devices)
             
             # Find peak hours
             if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                hourly_usage = df.groupby(df['timestamp'].dt.hour)['power_watts'].mean()
-                peak_hours = hourly_usage.nlargest(3).index.tolist()
+                hour = df['timestamp'].dt.hour.to_numpy()
+                peak_hours = _top_hours(_hourly_mean_power(hour, power))
+                
+                # Each device's own peak hour from its hourly profile
+                device_peak_hours = dict(zip(devices, _device_peak_hours(codes, hour, power, len(devices)).tolist()))
             else:
                 peak_hours = [18, 19, 20]  # Default evening hours
-            
-            # Device summary
-            device_summary = {}
-            for device_id in df['device_id'].unique():
-                device_data = df[df['device_id'] == device_id]
-                device_summary[device_id] = {
-                    'avg_power_watts': device_data['power_watts'].mean(),
-                    'total_energy_kwh': device_data['energy_kwh'].sum(),
-                    'total_cost': device_data['cost'].sum()
+                device_peak_hours = {}
+            
+            # Device summary - per-device sums from bincounts over the category codes, no hash groupby
+            counts = np.bincount(codes, minlength=len(devices))
+            power_sums = np.bincount(codes, weights=power, minlength=len(devices))
+            energy_sums = np.bincount(codes, weights=energy, minlength=len(devices))
+            cost_sums = np.bincount(codes, weights=cost, minlength=len(devices))
+            device_summary = {
+                devices[i]: {
+                    'avg_power_watts': float(power_sums[i] / counts[i]),
+                    'total_energy_kwh': float(energy_sums[i]),
+                    'total_cost': float(cost_sums[i]),
+                    'peak_hour': device_peak_hours.get(devices[i], 18),
                 }
+                for i in pd.unique(codes)  # devices in order of first reading, as before
+            }
             
             # Generate simple insights
             insights = []
@@ -1240,6 +1624,14 @@ class EnergyAIAnalyzer:
 
 
 # CLI interface for testing
+def dumps_report(result: Dict) -> str:
+    """Pretty-print a report as JSON (orjson when installed - it handles datetimes and NumPy values natively)"""
+    if ORJSON_AVAILABLE:
+        options = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(result, option=options, default=str).decode()
+    return json.dumps(result, indent=2, default=str)
+
+
 if __name__ == "__main__":
     import sys
     
@@ -1250,17 +1642,17 @@ if __name__ == "__main__":
             device_id = sys.argv[2] if len(sys.argv) > 2 else "living_room_tv"
             result = analyzer.analyze_device_patterns(device_id)
             print(f"\n=== Device Analysis: {device_id} ===")
-            print(json.dumps(result, indent=2, default=str))
+            print(dumps_report(result))
         
         elif sys.argv[1] == "home":
             result = analyzer.analyze_home_energy()
             print("\n=== Home Energy Analysis ===")
-            print(json.dumps(result, indent=2, default=str))
+            print(dumps_report(result))
         
         elif sys.argv[1] == "daily":
             result = analyzer.generate_daily_report()
             print("\n=== Daily Energy Report ===")
-            print(json.dumps(result, indent=2, default=str))
+            print(dumps_report(result))
     
     else:
         print("Usage:")
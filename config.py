@@ -2,6 +2,7 @@
 
 import os
 from pathlib import Path
+import numpy as np
 
 # Project paths
 PROJECT_ROOT = Path(__file__).parent
@@ -16,15 +17,25 @@ LOGS_DIR.mkdir(exist_ok=True)
 # Data collection settings
 POLLING_INTERVAL = 60  # seconds between readings
 BATCH_SIZE = 100       # readings to process at once
+DB_FLUSH_INTERVAL = 60  # seconds buffered readings may wait before being written
+DB_MMAP_SIZE = 256 * 1024 * 1024  # bytes of the database file SQLite reads through mmap
+DB_CACHE_SIZE_KB = 65536  # per-connection page cache
 
 # AI model settings
 AI_ENABLED = True  # Set to False to disable AI features entirely
 USE_MOCK_AI = True  # Set to False when gpt-oss is available
+USE_TEMPLATE_INSIGHTS = True  # Format device stats with templates; set False to send them to the LLM (deep analysis)
+BACKGROUND_AI_INSIGHTS = True  # Decode LLM insights on a worker thread; requests get the last result or a template
 MODEL_NAME = "gpt-oss-20b"  # Will be updated when model is available
 FALLBACK_MODEL = "microsoft/DialoGPT-medium"  # Fallback model for testing
 MAX_CONTEXT_LENGTH = 2048
 TEMPERATURE = 0.7
 MAX_RESPONSE_TOKENS = 200
+MODEL_QUANTIZATION = "int8"  # GPU weight format via bitsandbytes: "int8", "nf4" or "none"
+# generate() KV cache format: "int8" (HQQ), "int4" (quanto) or "none".
+# Quantized caches replace the prompt prefix cache (full prefill every call, fewer bytes per decode step);
+# "none" (or a missing backend package) primes the prefix once and copies its full-precision K/V per call.
+KV_CACHE_QUANTIZATION = "int8"
 
 # AI analysis settings
 ANALYSIS_LOOKBACK_DAYS = 7  # Days of data to analyze
@@ -107,6 +118,14 @@ ENERGY_SENSORS = {
     }
 }
 
+# CT sensors as column arrays (one entry per sensor, same order) so all channels
+# can be converted to power in one vectorized step per poll
+CT_SENSOR_IDS = [device_id for device_id, sensor in ENERGY_SENSORS.items() if sensor['type'] == 'ct_sensor']
+CT_CHANNELS = np.array([ENERGY_SENSORS[d]['adc_channel'] for d in CT_SENSOR_IDS], dtype=np.uint8)
+CT_RATIOS = np.array([ENERGY_SENSORS[d]['ct_ratio'] for d in CT_SENSOR_IDS], dtype=np.float32)
+CT_VOLTAGES = np.array([ENERGY_SENSORS[d]['voltage'] for d in CT_SENSOR_IDS], dtype=np.float32)
+CT_CALIBRATION = np.array([ENERGY_SENSORS[d].get('calibration_factor', 1.0) for d in CT_SENSOR_IDS], dtype=np.float32)
+
 # ADC Configuration (MCP3008)
 ADC_SPI_PORT = 0
 ADC_SPI_DEVICE = 0
@@ -129,13 +148,14 @@ if os.getenv('SMART_ENERGY_DEBUG'):
 if os.getenv('SMART_ENERGY_AI_DISABLED'):
     AI_ENABLED = False
 
-# Hardware detection
-RASPBERRY_PI_DETECTED = os.path.exists('/proc/device-tree/model')
-if RASPBERRY_PI_DETECTED:
-    try:
-        with open('/proc/device-tree/model', 'r') as f:
-            PI_MODEL = f.read().strip()
-    except:
-        PI_MODEL = "Unknown Raspberry Pi"
-else:
-    PI_MODEL = None
\ No newline at end of file
+# Hardware detection - a single open() instead of an exists() probe followed by the read
+try:
+    with open('/proc/device-tree/model', 'r') as f:
+        PI_MODEL = f.read().strip('\x00\n ') or "Unknown Raspberry Pi"
+    RASPBERRY_PI_DETECTED = True
+except FileNotFoundError:
+    RASPBERRY_PI_DETECTED = False
+    PI_MODEL = None
+except OSError:
+    RASPBERRY_PI_DETECTED = True
+    PI_MODEL = "Unknown Raspberry Pi"
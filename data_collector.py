@@ -73,13 +73,16 @@ class EnergyDataCollector:
             logger.error(f"Error collecting from Shelly device {device_config['name']}: {e}")
             return None
     
-    def collect_ct_sensor_data(self, device_id: str, device_config: Dict) -> Optional[Dict]:
-        """Collect data from CT current sensors"""
+    def collect_ct_sensor_data(self, device_id: str, device_config: Dict, reading: Optional[Dict] = None,
+                               current_time: Optional[datetime] = None) -> Optional[Dict]:
+        """Collect data from CT current sensors (reading and time may come from a batched read of all sensors)"""
         try:
-            reading = self.sensor_interface.read_ct_sensor(device_config)
+            if reading is None:
+                reading = self.sensor_interface.read_ct_sensor(device_config)
+            if current_time is None:
+                current_time = datetime.now()
             
             # Calculate energy consumption since last reading
-            current_time = datetime.now()
             power_watts = reading['power_watts']
             
             if device_id in self.energy_accumulator:
@@ -106,7 +109,9 @@ class EnergyDataCollector:
             logger.error(f"Error collecting from CT sensor {device_config['name']}: {e}")
             return None
 
-    async def collect_from_device(self, device_id: str, device_config: Dict) -> Optional[Dict]:
+    async def collect_from_device(self, device_id: str, device_config: Dict,
+                                  ct_readings: Optional[Dict[str, Dict]] = None,
+                                  current_time: Optional[datetime] = None) -> Optional[Dict]:
         """Collect data from a single device based on its type"""
         device_type = device_config.get('type', 'unknown')
         
@@ -115,7 +120,8 @@ class EnergyDataCollector:
         elif device_type == 'shelly':
             return await self.collect_shelly_data(device_config)
         elif device_type == 'ct_sensor':
-            return self.collect_ct_sensor_data(device_id, device_config)
+            reading = ct_readings.get(device_id) if ct_readings else None
+            return self.collect_ct_sensor_data(device_id, device_config, reading, current_time)
         else:
             logger.warning(f"Unknown device type: {device_type}")
             return None
@@ -123,9 +129,19 @@ class EnergyDataCollector:
     async def collect_all_devices(self) -> List[Dict]:
         """Collect data from all configured devices"""
         tasks = []
+        # One timestamp for the whole cycle - CT sensors are sampled together, so they share it
+        current_time = datetime.now()
+        
+        # Hardware CT sensors are sampled together in one pass when the interface supports it
+        ct_readings = None
+        if hasattr(self.sensor_interface, 'read_all_ct_sensors'):
+            try:
+                ct_readings = self.sensor_interface.read_all_ct_sensors()
+            except Exception as e:
+                logger.error(f"Batched CT sensor read failed, reading sensors one by one: {e}")
         
         for device_id, device_config in self.devices.items():
-            task = self.collect_from_device(device_id, device_config)
+            task = self.collect_from_device(device_id, device_config, ct_readings, current_time)
             tasks.append(task)
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -150,11 +166,18 @@ class EnergyDataCollector:
                     power_watts=reading['power_watts'],
                     voltage=reading.get('voltage'),
                     current=reading.get('current'),
-                    energy_kwh=reading.get('energy_kwh')
+                    energy_kwh=reading.get('energy_kwh'),
+                    timestamp=reading.get('timestamp')
                 )
                 logger.info(f"Saved reading for {reading['device_name']}: {reading['power_watts']}W")
             except Exception as e:
                 logger.error(f"Error saving reading: {e}")
+        
+        # One transaction per collection cycle
+        try:
+            self.db.flush(force=True)
+        except Exception as e:
+            logger.error(f"Error writing readings: {e}")
     
     async def start_collection(self):
         """Start the continuous data collection process"""
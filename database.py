@@ -1,29 +1,145 @@
 """Database operations for energy monitoring data"""
 
+import atexit
+import os
 import sqlite3
 import logging
-from datetime import datetime, timedelta
+import threading
+import time
+import weakref
+from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
+import numpy as np
 import config
 
+# Columns returned by the reading queries unless a caller asks for others.
+# All of them live in the covering indexes, so the default read never touches table rows.
+# cost is not indexed: reads derive it from energy_kwh at the current ELECTRICITY_RATE.
+READING_COLUMNS = ('device_id', 'device_name', 'timestamp', 'power_watts', 'energy_kwh', 'cost')
+# Every energy_readings column a caller may request
+ALL_READING_COLUMNS = frozenset(('id', 'device_id', 'device_name', 'timestamp', 'power_watts',
+                                 'voltage', 'current', 'energy_kwh', 'cost', 'created_at'))
+
+# Stored in PRAGMA user_version once init_database has built the tables and indexes -
+# bump it whenever either changes so existing files are brought up to date
+SCHEMA_VERSION = 1
+
+# Free pages tolerated before optimize_database reclaims them, and the most it reclaims per call
+VACUUM_FREELIST_THRESHOLD = 1000
+VACUUM_PAGES_PER_CALL = 1000
+# Rows removed per transaction by cleanup_old_data
+CLEANUP_CHUNK_SIZE = 5000
+
+# Buffered readings kept while the database can't be written (e.g. locked) - the oldest are dropped beyond this
+MAX_PENDING_READINGS = 10 * config.BATCH_SIZE
+
+INSERT_READING_SQL = """
+    INSERT INTO energy_readings 
+    (device_id, device_name, timestamp, power_watts, voltage, current, energy_kwh, cost)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Rows SQLite refuses on their own (bad values or types) - they are skipped, not retried
+_ROW_ERRORS = (sqlite3.IntegrityError, sqlite3.DataError, sqlite3.InterfaceError)
+
+# Databases with buffered readings to write at exit - weak, so the hook doesn't keep instances alive
+_open_databases = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_databases():
+    """Write whatever is still buffered when the process exits"""
+    for database in list(_open_databases):
+        try:
+            database.flush(force=True)
+        except Exception as e:
+            logging.error(f"Error writing buffered readings at exit: {e}")
+
+# Time cutoffs are passed to SQLite as date modifiers ('-24 hours', '-7 days') and resolved by
+# datetime('now', 'localtime', ?) in the query - readings are stored in local time
+# Timestamps are ISO-8601 text ('YYYY-MM-DD HH:MM:SS' or with a 'T'), so date ranges compare the
+# raw column and the hour is sliced out of characters 12-13 rather than parsed per row
+
+
+def _select_columns(columns: Tuple[str, ...]) -> str:
+    """Validated column list for a SELECT (names are interpolated, so only known columns pass)"""
+    unknown = set(columns) - ALL_READING_COLUMNS
+    if unknown:
+        raise ValueError(f"Unknown energy_readings columns: {sorted(unknown)}")
+    return ', '.join(_cost_expression() if column == 'cost' else column for column in columns)
+
+
+def _cost_expression() -> str:
+    """cost computed from energy_kwh, so it never has to be read from the table row"""
+    return f"IFNULL(energy_kwh, 0) * {float(config.ELECTRICITY_RATE)!r} AS cost"
+
+
+def connect(db_path, **kwargs) -> sqlite3.Connection:
+    """Open a SQLite connection tuned for this workload.
+
+    mmap turns repeat page reads into memory reads (shared through the OS page cache
+    across connections and processes), and temp B-trees for GROUP BY/ORDER BY stay in RAM.
+    """
+    conn = sqlite3.connect(db_path, **kwargs)
+    conn.execute(f"PRAGMA mmap_size={int(config.DB_MMAP_SIZE)}")
+    conn.execute(f"PRAGMA cache_size={-int(config.DB_CACHE_SIZE_KB)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    # Schema-defined functions/views never run with elevated trust
+    conn.execute("PRAGMA trusted_schema=OFF")
+    return conn
+
+
+def _rows_to_dicts(cursor: sqlite3.Cursor) -> List[Dict]:
+    """Zip plain tuple rows with the column names once, instead of building a sqlite3.Row per row"""
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
 class EnergyDatabase:
     def __init__(self, db_path: Path = None):
         # Use persistent storage path if available, otherwise use config default
         if db_path is None:
             # Check if running in production mode (systemd service)
-            import os
             if os.path.exists("/home/pi/energy_monitor_data"):
                 db_path = Path("/home/pi/energy_monitor_data/energy_monitor.db")
             else:
                 db_path = config.DATABASE_PATH
         
         self.db_path = db_path
+        # One lazily opened connection per thread (reopened after a fork)
+        self._local = threading.local()
         self.init_database()
+        
+        # Readings are buffered and written in batches on one long-lived connection
+        self._conn = None
+        self._pending: List[Tuple] = []
+        self._last_flush = time.monotonic()
+        self._write_lock = threading.Lock()
+        _open_databases.add(self)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection - opened once, so pragmas are not re-applied on every call"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = connect(self.db_path)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
     
     def init_database(self):
-        """Initialize the database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Initialize the database with required tables (skipped once the file is at SCHEMA_VERSION)"""
+        with self._connection() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            
+            # Free pages are returned in bounded steps by optimize_database instead of a full VACUUM.
+            # Only takes effect on a new file - existing ones are converted once by optimize_database.
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # WAL lets readers keep going while a batch is written; the setting is stored in the file
+            conn.execute("PRAGMA journal_mode=WAL")
+            
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS energy_readings (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -64,78 +180,232 @@ class EnergyDatabase:
             """)
             
             # Create indexes for better performance
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_readings_device_time ON energy_readings(device_id, timestamp)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_insights_device ON ai_insights(device_id)")
+            self._create_indexes(conn)
+            
+            # Refresh planner statistics where they are stale (cheap - skips tables that haven't changed much)
+            conn.execute("PRAGMA optimize")
             
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             conn.commit()
     
+    def _create_indexes(self, conn: sqlite3.Connection):
+        """Create the reading indexes and drop the narrower ones they replace"""
+        # Superseded by the covering indexes below (a prefix of one of them, or one that also carried cost)
+        for old_index in ('idx_readings_time', 'idx_readings_timestamp',
+                          'idx_readings_device_time', 'idx_readings_device_timestamp',
+                          'idx_readings_device_cover', 'idx_readings_time_cover'):
+            conn.execute(f"DROP INDEX IF EXISTS {old_index}")
+        
+        # Covering indexes: queries read only these columns, so SQLite answers them
+        # from the index pages without touching the table rows.
+        # Per-device lookups (device_id = ? AND timestamp >= ?)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_readings_device_energy
+            ON energy_readings(device_id, timestamp, device_name, power_watts, energy_kwh)
+        """)
+        # Whole-home time-range scans (timestamp >= ?)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_readings_time_energy
+            ON energy_readings(timestamp, device_id, device_name, power_watts, energy_kwh)
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_insights_device ON ai_insights(device_id)")
+    
     def add_reading(self, device_id: str, device_name: str, power_watts: float, 
-                   voltage: float = None, current: float = None, energy_kwh: float = None):
-        """Add a new energy reading"""
-        timestamp = datetime.now()
+                   voltage: float = None, current: float = None, energy_kwh: float = None,
+                   timestamp: datetime = None):
+        """Add a new energy reading (buffered - written by flush()); timestamp defaults to now"""
+        if timestamp is None:
+            timestamp = datetime.now()
         cost = (energy_kwh or 0) * config.ELECTRICITY_RATE
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT INTO energy_readings 
-                (device_id, device_name, timestamp, power_watts, voltage, current, energy_kwh, cost)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (device_id, device_name, timestamp, power_watts, voltage, current, energy_kwh, cost))
-            conn.commit()
+        with self._write_lock:
+            self._pending.append((device_id, device_name, timestamp, power_watts, voltage, current, energy_kwh, cost))
+        self.flush()
     
-    def get_recent_readings(self, device_id: str = None, hours: int = 24) -> List[Dict]:
-        """Get recent readings for analysis"""
-        since = datetime.now() - timedelta(hours=hours)
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+    def flush(self, force: bool = False):
+        """Write buffered readings in one transaction once BATCH_SIZE or DB_FLUSH_INTERVAL is reached (or when forced)"""
+        with self._write_lock:
+            if not self._pending:
+                return
+            if not force and len(self._pending) < config.BATCH_SIZE \
+                    and time.monotonic() - self._last_flush < config.DB_FLUSH_INTERVAL:
+                return
+            
+            if self._conn is None:
+                self._conn = connect(self.db_path, isolation_level=None, check_same_thread=False)
+                # In WAL mode NORMAL only syncs at checkpoints - one fsync per batch at most
+                self._conn.execute("PRAGMA synchronous=NORMAL")
             
+            try:
+                try:
+                    self._write_batch(self._pending)
+                except _ROW_ERRORS:
+                    # Some row is unwritable - write the rest one by one and drop the offenders
+                    self._write_rows_individually(self._pending)
+            except Exception:
+                # Keep the batch for the next flush (e.g. database locked), but never let it grow unbounded
+                if len(self._pending) > MAX_PENDING_READINGS:
+                    dropped = len(self._pending) - MAX_PENDING_READINGS
+                    del self._pending[:dropped]
+                    logging.error(f"Dropped {dropped} buffered readings that could not be written")
+                raise
+            
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+    
+    def _write_batch(self, rows: List[Tuple]):
+        """Insert rows in one transaction - all or nothing"""
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(INSERT_READING_SQL, rows)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+    
+    def _write_rows_individually(self, rows: List[Tuple]):
+        """Insert rows in one transaction, skipping (and logging) each row SQLite rejects"""
+        self._conn.execute("BEGIN")
+        try:
+            for row in rows:
+                try:
+                    self._conn.execute(INSERT_READING_SQL, row)
+                except _ROW_ERRORS as e:
+                    logging.error(f"Dropped reading for {row[1]} at {row[2]}: {e}")
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+    
+    def get_recent_readings(self, device_id: str = None, hours: int = 24,
+                            columns: Tuple[str, ...] = READING_COLUMNS) -> List[Dict]:
+        """Get recent readings for analysis (only the requested columns)"""
+        since = f'-{int(hours)} hours'
+        select = _select_columns(columns)
+        
+        with self._connection() as conn:
             if device_id:
-                cursor = conn.execute("""
-                    SELECT * FROM energy_readings 
-                    WHERE device_id = ? AND timestamp >= ?
+                cursor = conn.execute(f"""
+                    SELECT {select} FROM energy_readings 
+                    WHERE device_id = ? AND timestamp >= datetime('now', 'localtime', ?)
                     ORDER BY timestamp DESC
                 """, (device_id, since))
             else:
-                cursor = conn.execute("""
-                    SELECT * FROM energy_readings 
-                    WHERE timestamp >= ?
+                cursor = conn.execute(f"""
+                    SELECT {select} FROM energy_readings 
+                    WHERE timestamp >= datetime('now', 'localtime', ?)
                     ORDER BY timestamp DESC
                 """, (since,))
             
-            return [dict(row) for row in cursor.fetchall()]
+            return _rows_to_dicts(cursor)
+    
+    def get_recent_readings_columnar(self, device_id: str = None, hours: int = 24) -> Dict[str, np.ndarray]:
+        """Get recent readings as one NumPy array per column (no per-row dicts)"""
+        since = f'-{int(hours)} hours'
+        
+        # Timestamps come back as unix seconds; unparseable ones map to 43200
+        # (a Thursday at noon) so they land on a weekday at midday
+        query = """
+            SELECT device_id, device_name,
+                   COALESCE(CAST(strftime('%s', timestamp) AS INTEGER), 43200),
+                   power_watts, energy_kwh
+            FROM energy_readings
+        """
+        
+        with self._connection() as conn:
+            if device_id:
+                rows = conn.execute(query + """
+                    WHERE device_id = ? AND timestamp >= datetime('now', 'localtime', ?)
+                    ORDER BY timestamp DESC
+                """, (device_id, since)).fetchall()
+            else:
+                rows = conn.execute(query + """
+                    WHERE timestamp >= datetime('now', 'localtime', ?)
+                    ORDER BY timestamp DESC
+                """, (since,)).fetchall()
+        
+        # Readings carry ~3 significant figures, so float32 halves the memory at no real cost
+        n = len(rows)
+        columns = {
+            'device_id': np.array([r[0] for r in rows], dtype=object),
+            'device_name': np.array([r[1] for r in rows], dtype=object),
+            'timestamp': np.fromiter((r[2] for r in rows), dtype=np.int64, count=n),
+            'power_watts': np.fromiter((r[3] or 0.0 for r in rows), dtype=np.float32, count=n),
+            'energy_kwh': np.fromiter((r[4] or 0.0 for r in rows), dtype=np.float32, count=n),
+        }
+        
+        # Scrub any stored inf/NaN once here so the analysis kernels only ever see finite values
+        for name in ('power_watts', 'energy_kwh'):
+            np.nan_to_num(columns[name], copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        columns['cost'] = columns['energy_kwh'] * np.float32(config.ELECTRICITY_RATE)
+        
+        return columns
     
     def get_device_stats(self, device_id: str, days: int = 7) -> Dict:
-        """Get statistical summary for a device"""
-        since = datetime.now() - timedelta(days=days)
+        """Get statistical summary for a device, including its average power for each hour of the day"""
+        since = f'-{int(days)} days'
         
-        with sqlite3.connect(self.db_path) as conn:
+        # One scan grouped by hour - the scalar stats are folded together from the hourly rows
+        with self._connection() as conn:
             cursor = conn.execute("""
                 SELECT 
+                    CAST(substr(timestamp, 12, 2) AS INTEGER) as hour,
                     COUNT(*) as reading_count,
-                    AVG(power_watts) as avg_power,
+                    TOTAL(power_watts) as power_sum,
                     MAX(power_watts) as max_power,
                     MIN(power_watts) as min_power,
-                    SUM(energy_kwh) as total_energy,
-                    SUM(cost) as total_cost
+                    SUM(energy_kwh) as total_energy
                 FROM energy_readings 
-                WHERE device_id = ? AND timestamp >= ?
+                WHERE device_id = ? AND timestamp >= datetime('now', 'localtime', ?)
+                GROUP BY hour
             """, (device_id, since))
+            rows = cursor.fetchall()
+        
+        reading_count = sum(row[1] for row in rows)
+        power_sum = sum(row[2] for row in rows)
+        hourly_avg = [0.0] * 24
+        total_energy = sum(row[5] or 0 for row in rows)
+        for hour, count, hour_power, _, _, _ in rows:
+            if hour is not None:
+                hourly_avg[hour] = hour_power / count
+        
+        return {
+            'reading_count': reading_count,
+            'avg_power': power_sum / reading_count if reading_count else 0,
+            'max_power': max((row[3] for row in rows if row[3] is not None), default=0),
+            'min_power': min((row[4] for row in rows if row[4] is not None), default=0),
+            'total_energy': total_energy,
+            'total_cost': total_energy * config.ELECTRICITY_RATE,
+            'hourly_avg': hourly_avg
+        }
+    
+    def get_monthly_aggregates(self, year: int, month: int) -> List[Dict]:
+        """Get per-device totals for one calendar month, most expensive device first"""
+        start = datetime(year, month, 1)
+        end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+        
+        with self._connection() as conn:
+            # TOTAL() is SUM() that returns 0.0 instead of NULL for all-NULL groups
+            cursor = conn.execute("""
+                SELECT 
+                    device_id,
+                    device_name,
+                    TOTAL(energy_kwh) as total_kwh,
+                    TOTAL(energy_kwh) * ? as total_cost,
+                    MAX(power_watts) as peak_power,
+                    COUNT(*) as reading_count
+                FROM energy_readings 
+                WHERE timestamp >= ? AND timestamp < ?
+                GROUP BY device_id
+                ORDER BY total_cost DESC
+            """, (config.ELECTRICITY_RATE, start, end))
             
-            row = cursor.fetchone()
-            return {
-                'reading_count': row[0] or 0,
-                'avg_power': row[1] or 0,
-                'max_power': row[2] or 0,
-                'min_power': row[3] or 0,
-                'total_energy': row[4] or 0,
-                'total_cost': row[5] or 0
-            }
+            return _rows_to_dicts(cursor)
     
     def add_device(self, device_id: str, device_name: str, device_type: str, 
                    location: str = None, ip_address: str = None):
         """Register a new device"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO devices 
                 (device_id, device_name, device_type, location, ip_address)
@@ -145,28 +415,24 @@ class EnergyDatabase:
     
     def save_ai_insight(self, device_id: str, insight_type: str, insight_text: str, confidence: float = 0.8):
         """Save an AI-generated insight"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             conn.execute("""
                 INSERT INTO ai_insights (device_id, insight_type, insight_text, confidence_score)
                 VALUES (?, ?, ?, ?)
             """, (device_id, insight_type, insight_text, confidence))
             conn.commit()
 
-    def get_readings_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
-        """Get readings for a specific date range"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("""
-                SELECT * FROM energy_readings 
-                WHERE DATE(timestamp) BETWEEN ? AND ?
+    def get_readings_by_date_range(self, start_date: str, end_date: str,
+                                   columns: Tuple[str, ...] = READING_COLUMNS) -> List[Dict]:
+        """Get readings for a specific date range (only the requested columns)"""
+        with self._connection() as conn:
+            cursor = conn.execute(f"""
+                SELECT {_select_columns(columns)} FROM energy_readings 
+                WHERE timestamp >= date(?) AND timestamp < date(?, '+1 day')
                 ORDER BY timestamp ASC
             """, (start_date, end_date))
             
-            readings = []
-            for row in cursor.fetchall():
-                readings.append(dict(row))
-            
-            return readings
+            return _rows_to_dicts(cursor)
     
     def get_database_stats(self) -> Dict:
         """Get database statistics"""
@@ -178,29 +444,24 @@ class EnergyDatabase:
         }
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Total readings
-                cursor = conn.execute("SELECT COUNT(*) FROM energy_readings")
-                stats["total_readings"] = cursor.fetchone()[0]
-                
-                # Total devices
-                cursor = conn.execute("SELECT COUNT(DISTINCT device_id) FROM energy_readings")
-                stats["total_devices"] = cursor.fetchone()[0]
-                
-                # Date range
+            with self._connection() as conn:
+                # Total readings, total devices, date range and size in one statement and one fetch.
+                # The size is page_count * page_size as SQLite sees it, which includes pages still in the WAL.
                 cursor = conn.execute("""
-                    SELECT MIN(timestamp) as start_date, MAX(timestamp) as end_date 
-                    FROM energy_readings
+                    SELECT 
+                        (SELECT COUNT(*) FROM energy_readings),
+                        (SELECT COUNT(DISTINCT device_id) FROM energy_readings),
+                        (SELECT MIN(timestamp) FROM energy_readings),
+                        (SELECT MAX(timestamp) FROM energy_readings),
+                        (SELECT page_count * page_size FROM pragma_page_count(), pragma_page_size())
                 """)
-                row = cursor.fetchone()
-                if row[0] and row[1]:
-                    stats["date_range"]["start"] = row[0]
-                    stats["date_range"]["end"] = row[1]
-            
-            # File size
-            import os
-            if os.path.exists(self.db_path):
-                stats["file_size_mb"] = os.path.getsize(self.db_path) / (1024 * 1024)
+                total_readings, total_devices, start_date, end_date, size_bytes = cursor.fetchone()
+                stats["total_readings"] = total_readings
+                stats["total_devices"] = total_devices
+                if start_date and end_date:
+                    stats["date_range"]["start"] = start_date
+                    stats["date_range"]["end"] = end_date
+                stats["file_size_mb"] = size_bytes / (1024 * 1024)
                 
         except Exception as e:
             logging.error(f"Error getting database stats: {e}")
@@ -210,23 +471,21 @@ class EnergyDatabase:
     def optimize_database(self):
         """Optimize database performance"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Analyze tables for query optimization
-                conn.execute("ANALYZE")
-                
-                # Vacuum to reclaim space
-                conn.execute("VACUUM")
-                
+            with self._connection() as conn:
                 # Create indexes if they don't exist
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_readings_timestamp 
-                    ON energy_readings(timestamp)
-                """)
+                self._create_indexes(conn)
                 
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_readings_device_timestamp 
-                    ON energy_readings(device_id, timestamp)
-                """)
+                # Analyze tables (and the indexes above) for query optimization
+                conn.execute("ANALYZE")
+                
+                # Reclaim space a bounded number of pages at a time (1 = FULL, 2 = INCREMENTAL)
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    # One-time conversion of a file created before incremental vacuum was enabled
+                    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                    conn.execute("VACUUM")
+                elif conn.execute("PRAGMA freelist_count").fetchone()[0] > VACUUM_FREELIST_THRESHOLD:
+                    # executescript steps the pragma to completion (execute() frees only one page)
+                    conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_CALL});")
                 
                 logging.info("Database optimization completed")
                 
@@ -236,23 +495,34 @@ class EnergyDatabase:
     def cleanup_old_data(self, days_to_keep: int = 365):
         """Remove old data beyond retention period"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+            cutoff = f'-{int(days_to_keep)} days'
+            deleted_count = 0
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("""
-                    DELETE FROM energy_readings 
-                    WHERE timestamp < ?
-                """, (cutoff_date,))
-                
-                deleted_count = cursor.rowcount
-                
-                if deleted_count > 0:
-                    logging.info(f"Cleaned up {deleted_count} old readings")
-                    # Optimize after cleanup
-                    self.optimize_database()
-                
-                return deleted_count
+            # Delete in bounded chunks, committing each one, so readers are never blocked for long
+            # and the WAL never has to hold the whole deletion
+            with self._connection() as conn:
+                while True:
+                    cursor = conn.execute("""
+                        DELETE FROM energy_readings 
+                        WHERE rowid IN (
+                            SELECT rowid FROM energy_readings
+                            WHERE timestamp < datetime('now', 'localtime', ?)
+                            LIMIT ?
+                        )
+                    """, (cutoff, CLEANUP_CHUNK_SIZE))
+                    conn.commit()
+                    
+                    if cursor.rowcount <= 0:
+                        break
+                    deleted_count += cursor.rowcount
+            
+            if deleted_count > 0:
+                logging.info(f"Cleaned up {deleted_count} old readings")
+                # Optimize after cleanup
+                self.optimize_database()
+            
+            return deleted_count
                 
         except Exception as e:
             logging.error(f"Data cleanup failed: {e}")
-            return 0
\ No newline at end of file
+            return 0
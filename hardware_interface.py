@@ -3,11 +3,36 @@
 import time
 import math
 import logging
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
+import numpy as np
 import config
 
 logger = logging.getLogger(__name__)
 
+# Simulated on-probability by time of day: (hours, device-name keywords, probability).
+# Devices outside their window's keywords fall back to the default; fridges are always likely on.
+ACTIVITY_WINDOWS = (
+    (range(6, 10), ('microwave', 'tv', 'computer'), 0.6),   # Morning
+    (range(17, 24), ('tv', 'computer', 'ac'), 0.7),          # Evening
+    (range(10, 17), ('computer', 'ac'), 0.5),                # Daytime
+)
+DEFAULT_ACTIVE_PROBABILITY = 0.4
+FRIDGE_ACTIVE_PROBABILITY = 0.85
+
+@lru_cache(maxsize=64)
+def activity_probabilities(device_name: str) -> np.ndarray:
+    """24-entry on-probability table for a device, indexed by hour (built once per device name)"""
+    name = device_name.lower()
+    if 'fridge' in name:
+        return np.full(24, FRIDGE_ACTIVE_PROBABILITY)
+    
+    probabilities = np.full(24, DEFAULT_ACTIVE_PROBABILITY)
+    for hours, keywords, probability in ACTIVITY_WINDOWS:
+        if any(keyword in name for keyword in keywords):
+            probabilities[hours.start:hours.stop] = probability
+    return probabilities
+
 class CurrentSensorInterface:
     def __init__(self):
         self.adc = None
@@ -89,6 +114,37 @@ class CurrentSensorInterface:
         
         return self._create_reading_dict(sensor_config, rms_current, power_watts, energy_kwh)
     
+    def read_all_ct_sensors(self, samples: int = 1000) -> Dict[str, Dict]:
+        """Read every configured CT sensor at once, keyed by device_id.
+        
+        Each sample step reads all channels back to back, then RMS current and power
+        are computed for all sensors together from the config.CT_* column arrays.
+        """
+        n_sensors = len(config.CT_SENSOR_IDS)
+        if n_sensors == 0:
+            return {}
+        
+        channels = [int(channel) for channel in config.CT_CHANNELS]
+        readings = np.empty((samples, n_sensors), dtype=np.float32)
+        sample_interval = 0.0001  # 100μs between samples (10kHz sampling)
+        
+        for i in range(samples):
+            for j, channel in enumerate(channels):
+                readings[i, j] = self.read_adc_channel(channel)
+            time.sleep(sample_interval)
+        
+        # RMS of the AC part (DC bias at half the reference voltage), then current and power per sensor
+        ac_readings = readings - config.ADC_VREF / 2
+        rms_voltage = np.sqrt(np.mean(ac_readings * ac_readings, axis=0, dtype=np.float64))
+        rms_current = (rms_voltage * config.CT_RATIOS / 1000) * config.CT_CALIBRATION
+        power_watts = config.CT_VOLTAGES * rms_current
+        
+        return {
+            device_id: self._create_reading_dict(config.ENERGY_SENSORS[device_id], float(rms_current[j]),
+                                                 float(power_watts[j]), float(power_watts[j]) / 1000)
+            for j, device_id in enumerate(config.CT_SENSOR_IDS)
+        }
+    
     def _create_reading_dict(self, sensor_config: Dict, current: float, power: float, energy: float) -> Dict:
         """Create standardized reading dictionary"""
         return {
@@ -141,14 +197,41 @@ class CurrentSensorInterface:
                 print(f"  Channel: {reading['adc_channel']}")
                 print()
 
+# ADC channel -> simulated device id
+SIMULATED_CHANNEL_DEVICES = {
+    0: 'living_room_tv',
+    1: 'kitchen_microwave',
+    2: 'kitchen_fridge',
+    3: 'bedroom_ac',
+    4: 'office_computer',
+    5: 'laundry_washer',
+    6: 'laundry_dryer'
+}
+
+# Basic simulation (without the realistic simulator): on-power ranges per device,
+# a 70% chance of being on, and standby draw otherwise. Unknown devices draw 5-50W.
+BASIC_POWER_RANGES = {
+    'living_room_tv': (80, 150),
+    'kitchen_microwave': (800, 1200),
+    'kitchen_fridge': (120, 200),
+    'bedroom_ac': (1500, 2500),
+    'office_computer': (200, 350),
+    'laundry_washer': (300, 700),
+    'laundry_dryer': (2000, 3500)
+}
+BASIC_ON_PROBABILITY = 0.7
+BASIC_STANDBY_RANGE = (2, 15)
+BASIC_UNKNOWN_RANGE = (5, 50)
+
 # Advanced simulation mode for realistic testing
 class SimulatedCurrentSensor:
     """Advanced simulated current sensor with realistic patterns"""
     
     def __init__(self):
-        import random
         from datetime import datetime, timedelta
-        self.random = random
+        # Private PCG64 generator, seeded from OS entropy - different patterns each run,
+        # and the global random module is left alone
+        self.rng = np.random.default_rng()
         self.datetime = datetime
         self.start_time = datetime.now()
         
@@ -223,11 +306,6 @@ class SimulatedCurrentSensor:
         except ImportError:
             logger.warning("Realistic simulation not available, using basic simulation")
             self.use_realistic_sim = False
-            # Add more randomness - seed with current time + random component for different patterns each run
-            # Use microseconds and process ID for maximum uniqueness each run
-            import os
-            seed = int(time.time() * 1000000) + os.getpid() + self.random.randint(0, 10000)
-            self.random.seed(seed)
         
         # Add interval-based randomness for continuous variation
         self.last_randomization = time.time()
@@ -235,7 +313,7 @@ class SimulatedCurrentSensor:
         
         # Global device activity control - randomly vary how many devices are active
         self.global_activity_state = {
-            'target_active_count': self.random.randint(2, 6),  # Random 2-6 devices active
+            'target_active_count': int(self.rng.integers(2, 7)),  # Random 2-6 devices active
             'last_activity_change': time.time(),
             'activity_change_interval': 120,  # Change activity pattern every 2 minutes for realistic variation
             'forced_off_devices': set(),  # Devices forced off for variety
@@ -251,20 +329,20 @@ class SimulatedCurrentSensor:
         """Add random variations to appliance profiles for each app run"""
         for appliance, profile in self.appliance_profiles.items():
             # Randomize base power within realistic ranges
-            base_variation = self.random.uniform(0.8, 1.2)
+            base_variation = self.rng.uniform(0.8, 1.2)
             profile['base_power'] = int(profile['base_power'] * base_variation)
             
             # Randomize standby power
             if 'standby_power' in profile:
-                standby_variation = self.random.uniform(0.5, 1.5)
+                standby_variation = self.rng.uniform(0.5, 1.5)
                 profile['standby_power'] = max(0, profile['standby_power'] * standby_variation)
             
             # Add random usage probability variations
-            profile['random_factor'] = self.random.uniform(0.7, 1.3)
+            profile['random_factor'] = self.rng.uniform(0.7, 1.3)
             
             # Randomize cycle patterns
             if profile.get('cycle_pattern'):
-                cycle_variation = self.random.uniform(0.8, 1.2)
+                cycle_variation = self.rng.uniform(0.8, 1.2)
                 profile['cycle_minutes'] = int(profile.get('cycle_minutes', 45) * cycle_variation)
     
     def _update_global_activity(self):
@@ -275,7 +353,7 @@ class SimulatedCurrentSensor:
         # Check if it's time to change activity pattern
         if current_time - self.global_activity_state['last_activity_change'] > self.global_activity_state['activity_change_interval']:
             # Randomly choose new target active count (2-6 devices)
-            self.global_activity_state['target_active_count'] = self.random.randint(2, 6)
+            self.global_activity_state['target_active_count'] = int(self.rng.integers(2, 7))
             self.global_activity_state['last_activity_change'] = current_time
             
             # Clear previous forced states
@@ -291,14 +369,14 @@ class SimulatedCurrentSensor:
             
             if target_count < len(all_devices):
                 # Force some devices off
-                devices_to_force_off = self.random.sample(all_devices, len(all_devices) - target_count)
+                devices_to_force_off = self.rng.choice(all_devices, len(all_devices) - target_count, replace=False).tolist()
                 self.global_activity_state['forced_off_devices'].update(devices_to_force_off)
             
             # Randomly force 1-2 devices on for variety
             remaining_devices = [d for d in all_devices if d not in self.global_activity_state['forced_off_devices']]
             if remaining_devices:
-                force_on_count = min(self.random.randint(1, 2), len(remaining_devices))
-                devices_to_force_on = self.random.sample(remaining_devices, force_on_count)
+                force_on_count = min(int(self.rng.integers(1, 3)), len(remaining_devices))
+                devices_to_force_on = self.rng.choice(remaining_devices, force_on_count, replace=False).tolist()
                 self.global_activity_state['forced_on_devices'].update(devices_to_force_on)
     
     def _should_device_be_active(self, device_name: str, device_id: str) -> bool:
@@ -306,21 +384,10 @@ class SimulatedCurrentSensor:
         # Use the actual device_id from config (like 'living_room_tv', 'kitchen_fridge', etc.)
         actual_device_id = device_id.replace('sim_', '')  # Remove sim_ prefix if present
         
-        # Map ADC channels to device IDs for proper identification
-        channel_to_device = {
-            0: 'living_room_tv',
-            1: 'kitchen_microwave', 
-            2: 'kitchen_fridge',
-            3: 'bedroom_ac',
-            4: 'office_computer',
-            5: 'laundry_washer',
-            6: 'laundry_dryer'
-        }
-        
         # If device_id is just a number (ADC channel), map it to proper device ID
         if actual_device_id.isdigit():
             channel = int(actual_device_id)
-            actual_device_id = channel_to_device.get(channel, actual_device_id)
+            actual_device_id = SIMULATED_CHANNEL_DEVICES.get(channel, actual_device_id)
         
         # Check forced states first
         if actual_device_id in self.global_activity_state['forced_off_devices']:
@@ -328,29 +395,8 @@ class SimulatedCurrentSensor:
         if actual_device_id in self.global_activity_state['forced_on_devices']:
             return True
         
-        # For fridge, keep it mostly active (it's essential)
-        if 'fridge' in device_name.lower():
-            return self.random.random() < 0.85  # 85% chance to be active
-        
-        # For other devices, use random probability based on time and device type
-        hour = self.datetime.now().hour
-        
-        # Different probabilities based on time of day
-        if 6 <= hour <= 9:  # Morning
-            morning_devices = ['microwave', 'tv', 'computer']
-            if any(d in device_name.lower() for d in morning_devices):
-                return self.random.random() < 0.6
-        elif 17 <= hour <= 23:  # Evening
-            evening_devices = ['tv', 'computer', 'ac']
-            if any(d in device_name.lower() for d in evening_devices):
-                return self.random.random() < 0.7
-        elif 10 <= hour <= 16:  # Daytime
-            daytime_devices = ['computer', 'ac']
-            if any(d in device_name.lower() for d in daytime_devices):
-                return self.random.random() < 0.5
-        
-        # Default random probability
-        return self.random.random() < 0.4
+        # Otherwise a random draw against the device's probability for this hour (fridges stay mostly on)
+        return bool(self.rng.random() < activity_probabilities(device_name)[self.datetime.now().hour])
     
     def _get_time_factors(self):
         """Get current time-based factors"""
@@ -397,9 +443,9 @@ class SimulatedCurrentSensor:
                 cycle_position = minutes_since_start % cycle_minutes
                 
                 if cycle_position < cycle_minutes * 0.33:  # On for 1/3 of cycle
-                    return base_power * self.random.uniform(0.9, 1.1)
+                    return base_power * self.rng.uniform(0.9, 1.1)
                 else:
-                    return standby_power * self.random.uniform(0.8, 1.2)
+                    return standby_power * self.rng.uniform(0.8, 1.2)
         
         # Usage hours pattern
         usage_hours = profile.get('usage_hours', [])
@@ -417,8 +463,8 @@ class SimulatedCurrentSensor:
             use_duration = profile.get('use_duration', 3)
             
             # Random chance of being in use
-            if self.random.random() < (daily_uses * use_duration) / (24 * 60):
-                return base_power * self.random.uniform(0.95, 1.05)
+            if self.rng.random() < (daily_uses * use_duration) / (24 * 60):
+                return base_power * self.rng.uniform(0.95, 1.05)
             else:
                 return standby_power
         
@@ -440,14 +486,14 @@ class SimulatedCurrentSensor:
                     else:  # Spin/drain
                         power_factor = 0.6
                     
-                    return base_power * power_factor * self.random.uniform(0.9, 1.1)
+                    return base_power * power_factor * self.rng.uniform(0.9, 1.1)
                 else:
                     # Cycle complete
                     state['cycle_start'] = None
                     return standby_power
             
             # Random chance to start cycle during usage hours
-            if in_usage_hours and self.random.random() < daily_prob / 24:
+            if in_usage_hours and self.rng.random() < daily_prob / 24:
                 state['cycle_start'] = self.datetime.now()
                 return base_power * 0.3  # Starting up
         
@@ -456,16 +502,16 @@ class SimulatedCurrentSensor:
             # Device is likely on during usage hours
             base_probability = 0.7 * weekend_factor * profile.get('random_factor', 1.0)
             # Add time-based randomness - more variation throughout the day
-            time_randomness = self.random.uniform(0.5, 1.5)
+            time_randomness = self.rng.uniform(0.5, 1.5)
             on_probability = min(0.95, base_probability * time_randomness)
             
-            if self.random.random() < on_probability:
+            if self.rng.random() < on_probability:
                 load_variation = profile.get('load_variation', 0.2)
-                variation = self.random.uniform(1 - load_variation, 1 + load_variation)
+                variation = self.rng.uniform(1 - load_variation, 1 + load_variation)
                 return base_power * variation * seasonal_adj
         
         # Default to standby power with some variation
-        return standby_power * self.random.uniform(0.8, 1.2)
+        return standby_power * self.rng.uniform(0.8, 1.2)
     
     def read_ct_sensor(self, sensor_config: Dict, samples: int = 1000) -> Dict:
         """Simulate realistic current sensor readings with enhanced realism"""
@@ -474,17 +520,7 @@ class SimulatedCurrentSensor:
         voltage = sensor_config['voltage']
         
         # Map ADC channel to device ID for realistic simulation
-        channel_to_device = {
-            0: 'living_room_tv',
-            1: 'kitchen_microwave', 
-            2: 'kitchen_fridge',
-            3: 'bedroom_ac',
-            4: 'office_computer',
-            5: 'laundry_washer',
-            6: 'laundry_dryer'
-        }
-        
-        device_id = channel_to_device.get(adc_channel, f"unknown_{adc_channel}")
+        device_id = SIMULATED_CHANNEL_DEVICES.get(adc_channel, f"unknown_{adc_channel}")
         
         # Use realistic simulation if available
         if self.use_realistic_sim:
@@ -508,29 +544,48 @@ class SimulatedCurrentSensor:
             'adc_channel': adc_channel
         }
     
+    def read_all_ct_sensors(self, samples: int = 1000) -> Dict[str, Dict]:
+        """Simulate every configured CT sensor at once, keyed by device_id (same readings as read_ct_sensor)"""
+        if self.use_realistic_sim:
+            return {device_id: self.read_ct_sensor(config.ENERGY_SENSORS[device_id], samples)
+                    for device_id in config.CT_SENSOR_IDS}
+        
+        sim_ids = [SIMULATED_CHANNEL_DEVICES.get(int(channel), f"unknown_{channel}") for channel in config.CT_CHANNELS]
+        power_watts = self._basic_realistic_powers(sim_ids)
+        voltages = config.CT_VOLTAGES.astype(np.float64)
+        current = np.divide(power_watts, voltages, out=np.zeros_like(power_watts), where=voltages > 0)
+        energy_kwh = power_watts / 1000  # Instantaneous conversion
+        
+        readings = {}
+        for j, device_id in enumerate(config.CT_SENSOR_IDS):
+            sensor_config = config.ENERGY_SENSORS[device_id]
+            readings[device_id] = {
+                'device_id': sim_ids[j],
+                'device_name': sensor_config['name'],
+                'current_amps': float(current[j]),
+                'power_watts': float(power_watts[j]),
+                'voltage': sensor_config['voltage'],
+                'energy_kwh': float(energy_kwh[j]),
+                'sensor_type': 'ct_sensor_simulated',
+                'adc_channel': sensor_config['adc_channel']
+            }
+        return readings
+    
+    def _basic_realistic_powers(self, device_ids: List[str]) -> np.ndarray:
+        """Basic power draws for several devices in one pass - on/off and level drawn as whole arrays"""
+        known = np.array([device_id in BASIC_POWER_RANGES for device_id in device_ids], dtype=bool)
+        on_low, on_high = np.array([BASIC_POWER_RANGES.get(device_id, BASIC_UNKNOWN_RANGE)
+                                    for device_id in device_ids], dtype=np.float64).reshape(-1, 2).T
+        
+        # Known devices are on with BASIC_ON_PROBABILITY, otherwise in standby; unknown ones always use their range
+        is_on = ~known | (self.rng.random(len(device_ids)) < BASIC_ON_PROBABILITY)
+        low = np.where(is_on, on_low, BASIC_STANDBY_RANGE[0])
+        high = np.where(is_on, on_high, BASIC_STANDBY_RANGE[1])
+        return self.rng.uniform(low, high)
+    
     def _get_basic_realistic_power(self, device_id: str, device_name: str) -> float:
         """Fallback realistic power generation if enhanced simulation not available"""
-        # Basic realistic power ranges
-        device_ranges = {
-            'living_room_tv': (80, 150),
-            'kitchen_microwave': (800, 1200),
-            'kitchen_fridge': (120, 200),
-            'bedroom_ac': (1500, 2500),
-            'office_computer': (200, 350),
-            'laundry_washer': (300, 700),
-            'laundry_dryer': (2000, 3500)
-        }
-        
-        if device_id in device_ranges:
-            min_power, max_power = device_ranges[device_id]
-            # 70% chance of being on with realistic power
-            if self.random.random() < 0.7:
-                return self.random.uniform(min_power, max_power)
-            else:
-                # Standby power
-                return self.random.uniform(2, 15)
-        else:
-            return self.random.uniform(5, 50)
+        return float(self._basic_realistic_powers([device_id])[0])
     
     def test_all_sensors(self):
         """Test simulated sensors"""
@@ -10,22 +10,156 @@ import threading
 import time
 import signal
 from datetime import datetime
-import random
+from typing import Tuple
+import numpy as np
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from web_interface_fixed import app
+from web_interface_fixed import app, publish_update
+from database import connect
 import config
 
+# Numba is optional - the NumPy implementation below is used without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# waitress is optional - Flask's development server is used without it
+try:
+    from waitress import serve
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+# Fixed pool of request threads - each keeps its database connections open between requests
+WEB_SERVER_THREADS = 8
+
+# Device-specific realistic patterns, as data: device_id -> (standby range, [(hours, on-probability, on range), ...]).
+# Outside its windows (or when the on-draw fails) a device draws its power from the standby range.
+POWER_MODEL_SPECS = {
+    "living_room_tv": ((2, 5), [(range(19, 24), 1.0, (120, 180)),      # Evening TV time
+                                (range(7, 10), 1.0, (80, 120))]),       # Morning news
+    "kitchen_microwave": ((1, 3), [(range(24), 0.05, (800, 1200))]),   # Only on when cooking
+    "kitchen_fridge": ((80, 200), []),                                  # Fridge cycles on/off
+    "bedroom_ac": ((5, 15), [(range(12, 19), 1.0, (1200, 2000))]),     # Hot afternoon
+    "office_computer": ((5, 15), [(range(8, 19), 1.0, (200, 400)),     # Work hours
+                                  (range(19, 23), 1.0, (150, 300))]),   # Evening use
+    "laundry_washer": ((2, 5), [(range(24), 0.1, (400, 600))]),        # Washing machine cycles
+    "laundry_dryer": ((3, 8), [(range(24), 0.08, (2000, 3000))]),      # Dryer cycles
+}
+DEFAULT_POWER_RANGE = (10, 50)
+
+# The specs unrolled into arrays indexed [model, hour] - one row per device plus a last row for unknown devices
+POWER_MODEL_INDEX = {device_id: i for i, device_id in enumerate(POWER_MODEL_SPECS)}
+DEFAULT_POWER_MODEL = len(POWER_MODEL_SPECS)
+
+
+def _build_power_model_tables():
+    """Unroll POWER_MODEL_SPECS into on-probability, on-range and standby-range arrays"""
+    n_models = len(POWER_MODEL_SPECS) + 1
+    on_probability = np.zeros((n_models, 24))
+    on_low = np.zeros((n_models, 24))
+    on_high = np.zeros((n_models, 24))
+    standby_low = np.empty(n_models)
+    standby_high = np.empty(n_models)
+    
+    for model, (standby, windows) in enumerate(POWER_MODEL_SPECS.values()):
+        standby_low[model], standby_high[model] = standby
+        for hours, probability, (low, high) in windows:
+            on_probability[model, hours.start:hours.stop] = probability
+            on_low[model, hours.start:hours.stop] = low
+            on_high[model, hours.start:hours.stop] = high
+    standby_low[DEFAULT_POWER_MODEL], standby_high[DEFAULT_POWER_MODEL] = DEFAULT_POWER_RANGE
+    
+    return on_probability, on_low, on_high, standby_low, standby_high
+
+
+ON_PROBABILITY, ON_LOW, ON_HIGH, STANDBY_LOW, STANDBY_HIGH = _build_power_model_tables()
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer - a bijective mix of 64-bit counters (uint64 arithmetic wraps)"""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def counter_uniforms(seed: int, tick: int, shape: Tuple[int, int]) -> np.ndarray:
+    """Uniforms in [0, 1) as a pure function of (seed, tick, position) - no generator state to share"""
+    key = _splitmix64(np.array([tick], dtype=np.uint64) ^ np.uint64(seed))
+    bits = _splitmix64(key + np.arange(shape[0] * shape[1], dtype=np.uint64))
+    # Top 53 bits -> a double in [0, 1)
+    return ((bits >> np.uint64(11)) * 2.0 ** -53).reshape(shape)
+
+
+def _simulate_power_numpy(models: np.ndarray, hour: int, seed: int, tick: int) -> np.ndarray:
+    """Draw one power reading for each model index in a single vectorized pass.
+    
+    The draws depend only on (seed, tick, position), so a tick can be replayed exactly.
+    """
+    on_draw, level = counter_uniforms(seed, tick, (2, models.size))
+    is_on = on_draw < ON_PROBABILITY[models, hour]
+    low = np.where(is_on, ON_LOW[models, hour], STANDBY_LOW[models])
+    high = np.where(is_on, ON_HIGH[models, hour], STANDBY_HIGH[models])
+    return low + (high - low) * level
+
+
+def _simulate_power_loop(models, hour, seed, tick):
+    """Per-device loop over the same draws as _simulate_power_numpy (compiled with Numba when available)"""
+    n = models.size
+    powers = np.empty(n)
+    key = _mix64(np.uint64(tick) ^ np.uint64(seed))
+    for i in range(n):
+        # Same counter layout as counter_uniforms(seed, tick, (2, n)): on-draws first, then levels
+        on_draw = (_mix64(key + np.uint64(i)) >> np.uint64(11)) * 2.0 ** -53
+        level = (_mix64(key + np.uint64(n + i)) >> np.uint64(11)) * 2.0 ** -53
+        model = models[i]
+        if on_draw < ON_PROBABILITY[model, hour]:
+            low, high = ON_LOW[model, hour], ON_HIGH[model, hour]
+        else:
+            low, high = STANDBY_LOW[model], STANDBY_HIGH[model]
+        powers[i] = low + (high - low) * level
+    return powers
+
+
+# The power tables are module constants, so the compiled kernel bakes them in
+if NUMBA_AVAILABLE:
+    _mix64 = njit('uint64(uint64)', cache=True)(_splitmix64)
+    simulate_power = njit('float64[:](intp[:], int64, uint64, uint64)', cache=True)(_simulate_power_loop)
+else:
+    simulate_power = _simulate_power_numpy
+
+
+# Prepared once by the writer connection's statement cache and reused every tick
+INSERT_READING_SQL = """
+    INSERT INTO energy_readings 
+    (device_id, device_name, timestamp, power_watts, voltage, current, energy_kwh, cost)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 class SimpleEnergyApp:
     """Simple energy monitor with live simulation"""
     
     def __init__(self):
         self.running = False
         self.simulation_thread = None
+        # Simulation draws are a function of (seed, tick) - a fresh seed gives each run its own pattern
+        self.seed = int.from_bytes(os.urandom(8), 'little')
+        self.tick = 0
         self.setup_fresh_database()
         
+        # One writer connection for the life of the app instead of a fresh open per tick.
+        # The initial tick runs on the main thread and later ones on the simulation thread, so access is locked.
+        self._conn = connect(str(config.DATABASE_PATH), isolation_level=None, check_same_thread=False)
+        # In WAL mode NORMAL only syncs at checkpoints, not on every commit
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn_lock = threading.Lock()
+        
     def setup_fresh_database(self):
         """Create fresh database with today's data"""
         # Remove any existing databases
@@ -38,6 +172,8 @@ class SimpleEnergyApp:
         db_path = str(config.DATABASE_PATH)  # Use config path: data/energy_monitor.db
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
+        # WAL lets the web interface keep reading while the simulation writes; the setting is stored in the file
+        cursor.execute("PRAGMA journal_mode=WAL")
         
         # Create tables
         cursor.execute("""
@@ -78,112 +214,68 @@ class SimpleEnergyApp:
             ("laundry_dryer", "Electric Dryer", "Laundry Room")
         ]
         
-        # Clear any existing data first
-        cursor.execute("DELETE FROM devices")
-        cursor.execute("DELETE FROM energy_readings")
-        
-        for device_id, device_name, location in devices:
-            # Add device
-            cursor.execute("""
+        # Clear any existing data and add the devices in one transaction
+        with conn:
+            cursor.execute("DELETE FROM devices")
+            cursor.execute("DELETE FROM energy_readings")
+            cursor.executemany("""
                 INSERT INTO devices 
                 (device_id, device_name, device_type, location, ip_address)
                 VALUES (?, ?, 'smart_plug', ?, '192.168.1.100')
-            """, (device_id, device_name, location))
+            """, devices)
         
-        conn.commit()
         conn.close()
         
         print(f"✅ Fresh database created: {db_path}")
         print(f"📅 Starting date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
-    def get_realistic_power(self, device_name, hour):
+    def get_realistic_power(self, device_id, hour):
         """Get realistic power consumption based on device and time"""
-        current_hour = datetime.now().hour
-        
-        # Device-specific realistic patterns
-        if "TV" in device_name:
-            if 19 <= current_hour <= 23:  # Evening TV time
-                return random.uniform(120, 180)
-            elif 7 <= current_hour <= 9:  # Morning news
-                return random.uniform(80, 120)
-            else:
-                return random.uniform(2, 5)  # Standby
-                
-        elif "Fridge" in device_name:
-            # Fridge cycles on/off
-            return random.uniform(80, 200)
-            
-        elif "AC" in device_name:
-            if 12 <= current_hour <= 18:  # Hot afternoon
-                return random.uniform(1200, 2000)
-            elif 20 <= current_hour <= 6:  # Night cooling
-                return random.uniform(800, 1200)
-            else:
-                return random.uniform(5, 15)  # Standby
-                
-        elif "Computer" in device_name:
-            if 8 <= current_hour <= 18:  # Work hours
-                return random.uniform(200, 400)
-            elif 19 <= current_hour <= 22:  # Evening use
-                return random.uniform(150, 300)
-            else:
-                return random.uniform(5, 15)  # Sleep mode
-                
-        elif "Microwave" in device_name:
-            # Microwave only on when cooking
-            if random.random() < 0.05:  # 5% chance of being on
-                return random.uniform(800, 1200)
-            else:
-                return random.uniform(1, 3)  # Standby
-                
-        elif "Washing" in device_name:
-            # Washing machine cycles
-            if random.random() < 0.1:  # 10% chance of running
-                return random.uniform(400, 600)
-            else:
-                return random.uniform(2, 5)  # Standby
-                
-        elif "Dryer" in device_name:
-            # Dryer cycles
-            if random.random() < 0.08:  # 8% chance of running
-                return random.uniform(2000, 3000)
-            else:
-                return random.uniform(3, 8)  # Standby
-        
-        # Default
-        return random.uniform(10, 50)
+        models = np.array([POWER_MODEL_INDEX.get(device_id, DEFAULT_POWER_MODEL)])
+        self.tick += 1
+        return float(simulate_power(models, hour, self.seed, self.tick)[0])
     
     def update_device_readings(self):
         """Update all device readings in database"""
-        conn = sqlite3.connect(str(config.DATABASE_PATH))
-        cursor = conn.cursor()
-        
-        # Get all devices
-        cursor.execute("SELECT device_id, device_name FROM devices")
-        devices = cursor.fetchall()
+        with self._conn_lock:
+            # Get all devices
+            devices = self._conn.execute("SELECT device_id, device_name FROM devices").fetchall()
+        if not devices:
+            return
+        device_ids, device_names = zip(*devices)
         
         current_time = datetime.now()
         
-        for device_id, device_name in devices:
-            # Get realistic power for this device at this time
-            power = self.get_realistic_power(device_name, current_time.hour)
-            
-            # Calculate other values
-            voltage = 120.0
-            current_amps = power / voltage
-            # Energy for this reading (1 minute = 1/60 hour)
-            energy_kwh = (power / 1000.0) * (1/60)  # kWh for 1 minute
-            cost = energy_kwh * config.ELECTRICITY_RATE
-            
-            # Insert reading with current timestamp
-            cursor.execute("""
-                INSERT INTO energy_readings 
-                (device_id, device_name, timestamp, power_watts, voltage, current, energy_kwh, cost)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (device_id, device_name, current_time.isoformat(), power, voltage, current_amps, energy_kwh, cost))
+        # Realistic power for every device at this time, drawn together
+        models = np.array([POWER_MODEL_INDEX.get(device_id, DEFAULT_POWER_MODEL) for device_id in device_ids],
+                          dtype=np.intp)
+        self.tick += 1
+        powers = simulate_power(models, current_time.hour, self.seed, self.tick)
         
-        conn.commit()
-        conn.close()
+        # Derived columns for every device at once
+        voltage = 120.0
+        current_amps = powers / voltage
+        # Energy for this reading (1 minute = 1/60 hour)
+        energy_kwh = (powers / 1000.0) * (1/60)  # kWh for 1 minute
+        cost = energy_kwh * config.ELECTRICITY_RATE
+        
+        # Rows are zipped straight from the columns - the timestamp and voltage are shared by the whole tick
+        n = len(devices)
+        rows = list(zip(device_ids, device_names, [current_time.isoformat()] * n, powers.tolist(), [voltage] * n,
+                        current_amps.tolist(), energy_kwh.tolist(), cost.tolist()))
+        
+        # Insert every reading with the current timestamp in one statement and one transaction
+        with self._conn_lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(INSERT_READING_SQL, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        
+        # Open dashboards refresh on this instead of waiting for their next poll
+        publish_update({'timestamp': rows[0][2], 'devices': n, 'total_power_watts': float(powers.sum())})
     
     def simulation_loop(self):
         """Background simulation loop"""
@@ -243,7 +335,10 @@ class SimpleEnergyApp:
         print()
         
         try:
-            app.run(host=host, port=port, debug=False, use_reloader=False)
+            if WAITRESS_AVAILABLE:
+                serve(app, host=host, port=port, threads=WEB_SERVER_THREADS)
+            else:
+                app.run(host=host, port=port, debug=False, use_reloader=False, threaded=True)
         except KeyboardInterrupt:
             self.running = False
 
@@ -3,29 +3,47 @@
 
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 base_url = "http://localhost:5000"
 
 endpoints = [
     "/api/energy_summary",
-    "/api/devices", 
+    "/api/devices",
     "/api/current_readings",
     "/api/daily_report",
     "/api/monthly_analysis",
     "/api/time_warp_status"
 ]
 
-for endpoint in endpoints:
+# One pooled session, so every probe reuses an open connection instead of a fresh TCP handshake
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=len(endpoints)))
+
+def fetch(endpoint):
+    """GET one endpoint - returns the response, or the exception it raised"""
+    try:
+        return session.get(f"{base_url}{endpoint}", timeout=10)
+    except Exception as e:
+        return e
+
+# The endpoints are independent, so probe them all at once (wall time ~ the slowest one)
+with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+    results = list(executor.map(fetch, endpoints))
+
+for endpoint, response in zip(endpoints, results):
     try:
         print(f"\nTesting {endpoint}...")
-        response = requests.get(f"{base_url}{endpoint}", timeout=10)
+        if isinstance(response, Exception):
+            raise response
         print(f"Status: {response.status_code}")
-        
+
         if response.status_code == 200:
             data = response.json()
             print(f"Response: {json.dumps(data, indent=2)[:200]}...")
         else:
             print(f"Error: {response.text[:200]}...")
-            
+
     except Exception as e:
-        print(f"Exception: {e}")
\ No newline at end of file
+        print(f"Exception: {e}")
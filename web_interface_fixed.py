@@ -4,19 +4,87 @@ Smart Energy Monitor - Fixed Web Interface
 Flask web application with comprehensive API endpoints
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
 import sqlite3
 import json
 import os
+import threading
 from datetime import datetime, timedelta
 from ai_analyzer import EnergyAIAnalyzer
+from database import connect
 from energy_calculator import EnergyCalculator
 import config
 
+# orjson is optional - jsonify falls back to Flask's standard json provider
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 app = Flask(__name__)
 
+if ORJSON_AVAILABLE:
+    class OrjsonProvider(DefaultJSONProvider):
+        """Serialize API responses with orjson - several times faster on the large analysis payloads"""
+        
+        def dumps(self, obj, **kwargs) -> str:
+            # Datetimes still go through Flask's default() so their format doesn't change
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, option=option, default=self.default).decode()
+    
+    app.json = OrjsonProvider(app)
+
+# One analyzer for the whole process so its analysis caches and background insights survive between requests
+_analyzer = None
+_calculator = None
+
+def get_analyzer():
+    """Get the shared EnergyAIAnalyzer, creating it on first use"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = EnergyAIAnalyzer()
+    return _analyzer
+
+def get_calculator():
+    """Get the shared EnergyCalculator, so its result cache outlives a single request"""
+    global _calculator
+    if _calculator is None:
+        _calculator = EnergyCalculator()
+    return _calculator
+
+# Each server thread keeps one open connection per database file, reused across its requests
+_db_local = threading.local()
+
+# Live updates: an in-process publisher (run_demo's simulation) pushes each new tick to
+# /api/stream subscribers, so open dashboards refresh when data lands instead of polling.
+_latest_update = {'version': 0, 'data': None}
+_update_condition = threading.Condition()
+# Each open stream holds a server thread - beyond this many, clients fall back to polling
+MAX_STREAM_CLIENTS = 4
+_stream_slots = threading.BoundedSemaphore(MAX_STREAM_CLIENTS)
+STREAM_KEEPALIVE = 15  # seconds between keep-alive comments on an idle stream
+
+def publish_update(data: dict):
+    """Announce new readings to every /api/stream subscriber"""
+    if _calculator is not None:
+        _calculator.clear_cache()
+    with _update_condition:
+        _latest_update['version'] += 1
+        _latest_update['data'] = data
+        _update_condition.notify_all()
+
+def live_updates_enabled() -> bool:
+    """True once something in this process has published an update"""
+    return _latest_update['version'] > 0
+
 def get_db_connection():
-    """Get database connection - prioritize fresh database"""
+    """Get this thread's database connection - prioritize fresh database"""
     # Priority order for database selection
     db_candidates = [
         str(config.DATABASE_PATH),  # Current config path
@@ -35,8 +103,16 @@ def get_db_connection():
     if db_path is None:
         db_path = str(config.DATABASE_PATH)
     
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conns = getattr(_db_local, 'conns', None)
+    if conns is None or _db_local.pid != os.getpid():
+        conns = _db_local.conns = {}
+        _db_local.pid = os.getpid()
+    
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = connect(db_path)
+        conn.row_factory = sqlite3.Row
+        conns[db_path] = conn
     return conn
 
 def get_time_warp_status():
@@ -50,7 +126,6 @@ def get_time_warp_status():
             FROM energy_readings
         """)
         result = cursor.fetchone()
-        conn.close()
         
         if result and result['earliest'] and result['latest']:
             earliest = datetime.fromisoformat(result['earliest'])
@@ -65,7 +140,7 @@ def get_time_warp_status():
 @app.route('/')
 def dashboard():
     """Main dashboard page"""
-    return render_template('dashboard.html')
+    return render_template('dashboard.html', live_updates=live_updates_enabled())
 
 @app.route('/insights')
 def insights():
@@ -92,7 +167,6 @@ def device_detail(device_id):
         """, (f'%{device_name}%',))
         
         result = cursor.fetchone()
-        conn.close()
         
         if not result:
             return f"Device {device_id} not found", 404
@@ -129,7 +203,7 @@ def device_detail(device_id):
 def api_current_readings():
     """Get current energy readings for all devices"""
     try:
-        calculator = EnergyCalculator()
+        calculator = get_calculator()
         daily_data = calculator.calculate_daily_energy_from_power_reading()
         
         readings = []
@@ -150,6 +224,31 @@ def api_current_readings():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stream')
+def api_stream():
+    """Server-sent events - one message per published update"""
+    if not _stream_slots.acquire(blocking=False):
+        # 204 tells EventSource not to reconnect
+        return Response(status=204)
+    
+    def events():
+        seen = 0
+        try:
+            while True:
+                with _update_condition:
+                    _update_condition.wait_for(lambda: _latest_update['version'] != seen, timeout=STREAM_KEEPALIVE)
+                    version, data = _latest_update['version'], _latest_update['data']
+                if version == seen:
+                    yield ": keep-alive\n\n"
+                    continue
+                seen = version
+                yield f"data: {app.json.dumps(data)}\n\n"
+        finally:
+            _stream_slots.release()
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
 @app.route('/api/device_history/<device_id>')
 def api_device_history(device_id):
     """Get historical data for a specific device"""
@@ -179,7 +278,6 @@ def api_device_history(device_id):
                 'energy_kwh': row['power_watts'] / 1000.0
             })
         
-        conn.close()
         return jsonify(history)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -191,33 +289,38 @@ def api_total_consumption():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Get current total power
+        # Get current total power - walk idx_readings_device_energy one device at a time
+        # (a seek per device instead of scanning every reading)
         cursor.execute("""
-            SELECT SUM(power_watts) as total_power
-            FROM energy_readings 
-            WHERE timestamp IN (
-                SELECT MAX(timestamp) 
-                FROM energy_readings 
-                GROUP BY device_id
+            WITH RECURSIVE device_ids(device_id) AS (
+                SELECT MIN(device_id) FROM energy_readings
+                UNION ALL
+                SELECT (SELECT MIN(device_id) FROM energy_readings WHERE device_id > device_ids.device_id)
+                FROM device_ids WHERE device_id IS NOT NULL
             )
+            SELECT SUM((
+                SELECT power_watts FROM energy_readings
+                WHERE device_id = device_ids.device_id
+                ORDER BY timestamp DESC LIMIT 1
+            )) as total_power
+            FROM device_ids WHERE device_id IS NOT NULL
         """)
         result = cursor.fetchone()
         total_power = result['total_power'] or 0
         
-        # Get daily energy consumption
+        # Get daily energy consumption and cost - each reading stands for one polling interval.
+        # A timestamp range (not date(timestamp)) lets SQLite read today from the covering index.
         cursor.execute("""
-            SELECT SUM(power_watts) / 1000.0 * COUNT(*) * ? / 3600.0 as daily_kwh
+            SELECT TOTAL(power_watts) * ? / 3600000.0 as daily_kwh,
+                   TOTAL(power_watts) * ? / 3600000.0 * ? as daily_cost
             FROM energy_readings 
-            WHERE date(timestamp) = date('now')
-        """, (config.POLLING_INTERVAL,))
+            WHERE timestamp >= date('now') AND timestamp < date('now', '+1 day')
+        """, (config.POLLING_INTERVAL, config.POLLING_INTERVAL, config.ELECTRICITY_RATE))
         result = cursor.fetchone()
-        daily_kwh = result['daily_kwh'] or 0
-        
-        # Calculate costs
-        daily_cost = daily_kwh * config.ELECTRICITY_RATE
+        daily_kwh = result['daily_kwh']
+        daily_cost = result['daily_cost']
         monthly_cost = daily_cost * 30
         
-        conn.close()
         return jsonify({
             'total_power_watts': round(total_power, 2),
             'daily_kwh': round(daily_kwh, 3),
@@ -231,7 +334,7 @@ def api_total_consumption():
 def api_home_analysis():
     """Get comprehensive home energy analysis"""
     try:
-        analyzer = EnergyAIAnalyzer()
+        analyzer = get_analyzer()
         analysis = analyzer.analyze_home_energy()
         return jsonify(analysis)
     except Exception as e:
@@ -242,7 +345,7 @@ def api_home_analysis():
 def api_device_analysis(device_id):
     """Get AI analysis for specific device"""
     try:
-        analyzer = EnergyAIAnalyzer()
+        analyzer = get_analyzer()
         analysis = analyzer.analyze_device_patterns(device_id)
         return jsonify(analysis)
     except Exception as e:
@@ -253,7 +356,7 @@ def api_device_analysis(device_id):
 def api_daily_report():
     """Get daily energy report"""
     try:
-        calculator = EnergyCalculator()
+        calculator = get_calculator()
         daily_data = calculator.calculate_daily_energy_from_actual_data()
         
         # Get time warp status
@@ -296,7 +399,7 @@ def api_daily_report():
 def api_monthly_analysis():
     """Get monthly energy analysis"""
     try:
-        calculator = EnergyCalculator()
+        calculator = get_calculator()
         now = datetime.now()
         monthly_data = calculator.calculate_monthly_analysis(now.year, now.month)
         
@@ -381,7 +484,6 @@ def api_time_warp_status():
             span_days = (latest - earliest).days
             span_info = f"{span_days} days of data"
         
-        conn.close()
         
         return jsonify({
             'is_time_warp': is_time_warp,
@@ -396,7 +498,7 @@ def api_time_warp_status():
 def api_energy_summary():
     """Get energy summary for dashboard"""
     try:
-        calculator = EnergyCalculator()
+        calculator = get_calculator()
         summary = calculator.get_current_power_summary()
         return jsonify(summary)
     except Exception as e:
@@ -434,7 +536,6 @@ def api_devices():
                 'location': location
             })
         
-        conn.close()
         return jsonify(devices)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -463,7 +564,6 @@ def api_historical_data(device_id):
         timestamps = [row['timestamp'] for row in data]
         power_watts = [row['power_watts'] for row in data]
         
-        conn.close()
         return jsonify({
             'timestamps': timestamps,
             'power_watts': power_watts